@@ -1,10 +1,121 @@
+import functools
 import re
-from typing import Set
+from typing import Callable, FrozenSet, Iterator, Set, Tuple
 import logging
-from bs4 import BeautifulSoup
+from io import BytesIO
+from lxml import etree
 
 logger = logging.getLogger(__name__)
 
+# Filtered CSS is truncated to this many characters (increased from 50KB)
+_MAX_FILTERED_CSS_CHARS = 100000
+
+_RE_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+_RE_CSS_SPECIAL = re.compile(r'[{};/"\']')
+_RE_TAG = re.compile(r'<(\w+)')
+_RE_CLASS = re.compile(r'class=["\']([^"\']*)["\']')
+_RE_ID = re.compile(r'id=["\']([^"\']*)["\']')
+_RE_SELECTOR_JUNK = re.compile(r'[^\w\s\-\.#\[\]=]')
+_RE_SELECTOR_TOKEN = re.compile(r'([.#]?)([\w-]+)')
+
+# Deletion table for the ASCII characters _RE_SELECTOR_JUNK removes
+_SELECTOR_JUNK_TABLE = str.maketrans('', '', ''.join(
+    ch for ch in map(chr, range(128)) if _RE_SELECTOR_JUNK.match(ch)
+))
+
+# Priority selectors that we definitely want to keep
+_PRIORITY_SELECTORS = frozenset((
+    'body', 'html', '*', 'head', 'meta', 'title', 'div', 'span', 'p', 
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'a', 'img', 'ul', 'ol', 'li', 
+    'nav', 'header', 'footer', 'main', 'section', 'article', 'aside',
+    'button', 'input', 'form', 'label', 'table', 'tr', 'td', 'th'
+))
+
+# Common layout and styling patterns
+_LAYOUT_PATTERNS = (
+    'container', 'wrapper', 'header', 'footer', 'nav', 'menu', 
+    'button', 'btn', 'card', 'grid', 'flex', 'row', 'col', 'sidebar',
+    'content', 'main', 'hero', 'banner', 'section', 'block', 'page',
+    'site', 'web', 'theme', 'style', 'layout', 'design'
+)
+
+# Finds any layout pattern in a single scan of the selector
+_RE_LAYOUT_PATTERN = re.compile('|'.join(map(re.escape, _LAYOUT_PATTERNS)))
+
+
+def _prelude_rule(css: str, sel_start: int, sel_end: int, end: int,
+                  has_comment: bool) -> Iterator[Tuple[str, int, int]]:
+    """
+    Yield the (selector, start, end) entry for the prelude css[sel_start:sel_end]
+    of a rule ending at ``end``, if the prelude isn't blank.
+    """
+    prelude = css[sel_start:sel_end]
+    selector = _RE_COMMENT.sub('', prelude) if has_comment else prelude
+    selector = selector.strip()
+    if selector:
+        # Leading comments were skipped, so the prelude's first
+        # non-space character is the selector's first character
+        yield selector, sel_start + prelude.find(selector[0]), end
+
+
+def _iter_rules(css: str) -> Iterator[Tuple[str, int, int]]:
+    """
+    Walk CSS once and yield (selector, start, end) for every top-level rule,
+    where css[start:end] is the complete rule including its declaration block.
+    Only the selector is copied; callers slice the rule if they keep it.
+    Statement at-rules (@import, @charset, ...) are yielded with their
+    whole text as the selector, and css[start:end] ending at the ';'.
+
+    Comments and quoted strings are skipped, and nested blocks such as
+    @media or @keyframes stay inside the body of their parent rule.
+    """
+    length = len(css)
+    depth = 0
+    sel_start = 0
+    sel_end = 0
+    sel_has_comment = False
+    search = _RE_CSS_SPECIAL.search
+    match = search(css)
+    while match:
+        start = i = match.start()
+        ch = css[i]
+        if ch == '/':
+            if css.startswith('*', i + 1):
+                end = css.find('*/', i + 2)
+                i = length if end == -1 else end + 1
+                if depth == 0:
+                    # Drop leading comments; flag ones inside a selector
+                    if css[sel_start:start].strip():
+                        sel_has_comment = True
+                    else:
+                        sel_start = i + 1
+        elif ch == '"' or ch == "'":
+            # Skip the string literal, honouring backslash escapes
+            i += 1
+            while i < length and css[i] != ch and css[i] != '\n':
+                i += 2 if css[i] == '\\' else 1
+        elif ch == '{':
+            if depth == 0:
+                sel_end = i
+            depth += 1
+        elif ch == '}':
+            if depth > 0:
+                depth -= 1
+                if depth == 0:
+                    yield from _prelude_rule(css, sel_start, sel_end, i + 1, sel_has_comment)
+            if depth == 0:
+                sel_start = i + 1
+                sel_has_comment = False
+        elif depth == 0:
+            # ';' ends a statement at-rule such as @import or @charset, which
+            # is yielded whole (prelude and end both at the ';')
+            for rule in _prelude_rule(css, sel_start, i, i + 1, sel_has_comment):
+                if rule[0].startswith('@'):
+                    yield rule
+            sel_start = i + 1
+            sel_has_comment = False
+        match = search(css, i + 1)
+
 
 def extract_css_selectors(css: str) -> Set[str]:
     """
@@ -13,22 +124,18 @@ def extract_css_selectors(css: str) -> Set[str]:
     logger.info("      → Extracting CSS selectors...")
     selectors = set()
     
-    # Remove comments
-    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
-    
-    # Find all CSS rules
-    rules = re.findall(r'([^{]+)\s*\{[^}]*\}', css)
-    logger.info(f"      → Found {len(rules)} CSS rules")
-    
-    for rule in rules:
+    # Walk the CSS rules as they are found
+    rule_count = 0
+    for rule, _, _ in _iter_rules(css):
+        rule_count += 1
         # Split by comma to handle multiple selectors
-        parts = rule.split(',')
-        for part in parts:
+        for part in rule.split(','):
             selector = part.strip()
             if selector:
                 selectors.add(selector)
+    logger.info("      → Found %d CSS rules", rule_count)
     
-    logger.info(f"      ✅ Extracted {len(selectors)} unique selectors")
+    logger.info("      ✅ Extracted %d unique selectors", len(selectors))
     return selectors
 
 
@@ -40,28 +147,122 @@ def extract_html_elements(html: str) -> Set[str]:
     elements = set()
     
     # Extract element types
-    element_types = re.findall(r'<(\w+)', html)
+    element_types = _RE_TAG.findall(html)
     elements.update(element_types)
-    logger.info(f"      → Found {len(element_types)} HTML element types")
+    logger.info("      → Found %d HTML element types", len(element_types))
     
     # Extract class names
-    class_names = re.findall(r'class=["\']([^"\']*)["\']', html)
-    class_count = 0
-    for class_list in class_names:
-        classes = class_list.split()
-        elements.update(classes)
-        class_count += len(classes)
-    logger.info(f"      → Found {class_count} CSS classes")
+    classes = ' '.join(_RE_CLASS.findall(html)).split()
+    elements.update(classes)
+    logger.info("      → Found %d CSS classes", len(classes))
     
     # Extract IDs
-    id_names = re.findall(r'id=["\']([^"\']*)["\']', html)
+    id_names = _RE_ID.findall(html)
     elements.update(id_names)
-    logger.info(f"      → Found {len(id_names)} HTML IDs")
+    logger.info("      → Found %d HTML IDs", len(id_names))
     
-    logger.info(f"      ✅ Total unique elements/classes/IDs: {len(elements)}")
+    logger.info("      ✅ Total unique elements/classes/IDs: %d", len(elements))
     return elements
 
 
+@functools.lru_cache(maxsize=32)
+def _collect_html_names(html_content: str) -> Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str]]:
+    """
+    Collect the element types, CSS classes and IDs used in the HTML content.
+
+    Results are cached per HTML string, so filtering several stylesheets
+    against the same page only parses it once.
+    """
+    elements = set()
+    classes = set()
+    ids = set()
+
+    # Single streaming pass; elements are cleared as soon as they are read
+    source = BytesIO(html_content.encode('utf-8'))
+    try:
+        for _, element in etree.iterparse(source, events=('end',), html=True,
+                                          recover=True, encoding='utf-8'):
+            elements.add(element.tag)
+            class_list = element.get('class')
+            if class_list:
+                classes.update(class_list.split())
+            element_id = element.get('id')
+            if element_id is not None:
+                ids.add(element_id)
+            element.clear()
+    except etree.XMLSyntaxError:
+        # Empty document
+        pass
+
+    return frozenset(elements), frozenset(classes), frozenset(ids)
+
+
+@functools.lru_cache(maxsize=32)
+def _html_matcher(html_content: str) -> Callable[[str], bool]:
+    """
+    Build a selector matcher specialised to one page's tag/class/id names.
+
+    Decisions are memoised per cleaned selector, so selectors repeated
+    across @media blocks or later filtering calls on the same page are
+    only tokenized once.
+    """
+    elements, classes, ids = _collect_html_names(html_content)
+    # Simple selectors by prefix: bare tag, .class or #id
+    names = {'': elements, '.': classes, '#': ids}
+    tokens = _RE_SELECTOR_TOKEN.findall
+    decisions = {}
+
+    def match(selector: str) -> bool:
+        # Check if any tag/class/id of the selector is in the HTML as one
+        found = decisions.get(selector)
+        if found is None:
+            found = decisions[selector] = any(
+                name in names[prefix] for prefix, name in tokens(selector)
+            )
+        return found
+
+    return match
+
+
+def _keep_rule(rule: str, html_matcher: Callable[[], Callable[[str], bool]]) -> bool:
+    """
+    Decide whether a rule should be kept, given its selector list.
+
+    The HTML matcher is only requested when no selector is kept by the
+    cheaper checks, so most stylesheets never need the HTML parsed.
+    """
+    undecided = []
+    for selector in rule.split(','):
+        if selector.isascii():
+            clean_selector = selector.translate(_SELECTOR_JUNK_TABLE).strip()
+        else:
+            clean_selector = _RE_SELECTOR_JUNK.sub('', selector).strip()
+
+        # Keep priority selectors
+        if clean_selector in _PRIORITY_SELECTORS:
+            return True
+
+        # Keep any selector that might be important (less aggressive filtering)
+        if len(clean_selector) > 2 and not clean_selector.startswith('_'):
+            return True
+
+        # Keep media queries and keyframes
+        if clean_selector.startswith(('@media', '@keyframes')) or ':' in clean_selector:
+            return True
+
+        # Keep common layout patterns
+        if _RE_LAYOUT_PATTERN.search(clean_selector):
+            return True
+
+        if clean_selector:
+            undecided.append(clean_selector)
+
+    if not undecided:
+        return False
+
+    return any(map(html_matcher(), undecided))
+
+
 def filter_css_from_html_and_css(html_content: str, css_content: str) -> str:
     """
     Filter CSS to include only selectors that are present in the HTML content.
@@ -72,137 +273,113 @@ def filter_css_from_html_and_css(html_content: str, css_content: str) -> str:
         logger.warning("      ⚠️  No CSS content provided")
         return ""
     
-    # Extract CSS rules
-    logger.info("      → Extracting CSS rules...")
-    css_rules = re.findall(r'([^{}]+)\s*\{[^}]*\}', css_content)
-    logger.info(f"      → Found {len(css_rules)} CSS rules")
-    
-    # Extract unique selectors
-    selectors = set()
-    for rule in css_rules:
-        # Split by comma to handle multiple selectors
-        rule_selectors = [s.strip() for s in rule.split(',')]
-        for selector in rule_selectors:
-            # Clean up the selector
-            clean_selector = re.sub(r'[^\w\s\-\.#\[\]=]', '', selector).strip()
-            if clean_selector:
-                selectors.add(clean_selector)
-    
-    logger.info(f"      ✅ Extracted {len(selectors)} unique selectors")
-    
-    # Extract HTML elements and classes
-    logger.info("      → Extracting HTML elements and classes...")
-    soup = BeautifulSoup(html_content, 'html.parser')
+    # The HTML is only parsed if a rule needs it
+    html_matcher = functools.partial(_html_matcher, html_content)
     
-    # Get all element types
-    elements = set()
-    for tag in soup.find_all():
-        elements.add(tag.name)
-    logger.info(f"      → Found {len(elements)} HTML element types")
-    
-    # Get all CSS classes
-    classes = set()
-    for tag in soup.find_all(class_=True):
-        class_list = tag.get('class', [])
-        if isinstance(class_list, list):
-            classes.update(class_list)
-        else:
-            classes.add(class_list)
-    logger.info(f"      → Found {len(classes)} CSS classes")
-    
-    # Get all IDs
-    ids = set()
-    for tag in soup.find_all(id=True):
-        ids.add(tag.get('id'))
-    logger.info(f"      → Found {len(ids)} HTML IDs")
-    
-    # Combine all HTML selectors
-    html_selectors = elements.union(classes).union(ids)
-    logger.info(f"      ✅ Total unique elements/classes/IDs: {len(html_selectors)}")
-    
-    # Filter CSS rules - be less aggressive to preserve more styling
+    # Filter CSS rules as they are tokenized - be less aggressive to preserve more styling
     logger.info("      → Filtering CSS rules...")
-    filtered_rules = []
-    total_rules = len(css_rules)
+    kept_spans = []
+    filtered_size = 0
+    total_rules = 0
     
-    # Priority selectors that we definitely want to keep
-    priority_selectors = [
-        'body', 'html', '*', 'head', 'meta', 'title', 'div', 'span', 'p', 
-        'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'a', 'img', 'ul', 'ol', 'li', 
-        'nav', 'header', 'footer', 'main', 'section', 'article', 'aside',
-        'button', 'input', 'form', 'label', 'table', 'tr', 'td', 'th'
-    ]
+    for rule, start, end in _iter_rules(css_content):
+        # Anything past the size limit would be truncated away below
+        if filtered_size > _MAX_FILTERED_CSS_CHARS:
+            break
+        total_rules += 1
+        if _keep_rule(rule, html_matcher):
+            kept_spans.append((start, end))
+            filtered_size += end - start + 1
     
-    # Common layout and styling patterns
-    layout_patterns = [
-        'container', 'wrapper', 'header', 'footer', 'nav', 'menu', 
-        'button', 'btn', 'card', 'grid', 'flex', 'row', 'col', 'sidebar',
-        'content', 'main', 'hero', 'banner', 'section', 'block', 'page',
-        'site', 'web', 'theme', 'style', 'layout', 'design'
-    ]
-    
-    for rule in css_rules:
-        # Check if any selector in this rule matches HTML content
-        rule_selectors = [s.strip() for s in rule.split(',')]
-        should_keep = False
-        
-        for selector in rule_selectors:
-            # Clean the selector
-            clean_selector = re.sub(r'[^\w\s\-\.#\[\]=]', '', selector).strip()
-            
-            # Check if this selector matches any HTML element/class/id
-            if clean_selector in html_selectors:
-                should_keep = True
-                break
-            
-            # Keep priority selectors
-            if clean_selector in priority_selectors:
-                should_keep = True
-                break
-            
-            # Keep media queries and keyframes
-            if clean_selector.startswith('@media') or clean_selector.startswith('@keyframes') or ':' in clean_selector:
-                should_keep = True
-                break
-            
-            # Keep common layout patterns
-            if any(pattern in clean_selector for pattern in layout_patterns):
-                should_keep = True
-                break
-            
-            # Keep any selector that might be important (less aggressive filtering)
-            if len(clean_selector) > 2 and not clean_selector.startswith('_'):
-                should_keep = True
-                break
-        
-        if should_keep:
-            # Find the complete CSS rule (including the declaration block)
-            rule_start = css_content.find(rule)
-            if rule_start != -1:
-                # Find the closing brace for this rule
-                brace_count = 0
-                rule_end = rule_start
-                for i in range(rule_start, len(css_content)):
-                    if css_content[i] == '{':
-                        brace_count += 1
-                    elif css_content[i] == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            rule_end = i + 1
-                            break
-                
-                if rule_end > rule_start:
-                    complete_rule = css_content[rule_start:rule_end]
-                    filtered_rules.append(complete_rule)
-    
-    logger.info(f"      ✅ CSS filtering complete: {len(filtered_rules)}/{total_rules} rules kept")
+    logger.info("      ✅ CSS filtering complete: %d/%d rules kept", len(kept_spans), total_rules)
     
     # Combine filtered rules and limit total size
-    filtered_css = '\n'.join(filtered_rules)
+    filtered_css = '\n'.join(css_content[start:end] for start, end in kept_spans)
     
     # If still too large, truncate to reasonable size but keep more than before
-    if len(filtered_css) > 100000:  # 100KB limit (increased from 50KB)
-        filtered_css = filtered_css[:100000]
-        logger.info(f"      ⚠️  CSS truncated to 100KB due to size limits")
+    if len(filtered_css) > _MAX_FILTERED_CSS_CHARS:
+        filtered_css = filtered_css[:_MAX_FILTERED_CSS_CHARS]
+        logger.info("      ⚠️  CSS truncated to 100KB due to size limits")
     
-    return filtered_css 
\ No newline at end of file
+    return filtered_css 
+
+
+def filter_css_strict(html_content: str, css_content: str) -> str:
+    """
+    Keep only CSS rules with a selector that exactly names a tag, .class or
+    #id used in the HTML content.
+    """
+    elements, classes, ids = _collect_html_names(html_content)
+    used_selectors = elements.union(
+        {f".{name}" for name in classes},
+        {f"#{name}" for name in ids},
+    )
+
+    filtered_rules = [
+        css_content[start:end]
+        for rule, start, end in _iter_rules(css_content)
+        if any(selector.strip() in used_selectors for selector in rule.split(','))
+    ]
+    return "\n\n".join(filtered_rules)
+
+
+# Pieces of a selector that don't narrow its key selector down to names:
+# functional pseudo-class arguments and attribute selectors (both may hold
+# spaces or combinator characters)
+_RE_ATTRIBUTE_SELECTOR = re.compile(r'\[[^\]]*\]')
+_RE_INNERMOST_ARGUMENTS = re.compile(r'\([^()]*\)')
+_RE_COMBINATOR = re.compile(r'\s*[>+~]\s*|\s+')
+_RE_KEY_TAG = re.compile(r'[\w-]+')
+_RE_KEY_CLASS = re.compile(r'\.([\w-]+)')
+_RE_KEY_ID = re.compile(r'#([\w-]+)')
+
+
+def _key_selector_matches(selector: str, elements: FrozenSet[str],
+                          classes: FrozenSet[str], ids: FrozenSet[str]) -> bool:
+    """
+    Whether the rightmost compound of ``selector`` (its key selector) could
+    match an element with one of the given tag/class/id names. Ancestors
+    are not checked, so the test only ever errs on the side of keeping.
+    """
+    if '\\' in selector:
+        # Escaped names (e.g. ".md\:flex") don't tokenize cleanly
+        return True
+    # Drop attribute selectors, then pseudo-class arguments innermost-first
+    # so nested ones like ":is(:not(.a) b)" go away whole
+    selector = _RE_ATTRIBUTE_SELECTOR.sub('', selector)
+    nested = 1
+    while nested:
+        selector, nested = _RE_INNERMOST_ARGUMENTS.subn('', selector)
+    if '(' in selector or ')' in selector:
+        # Unbalanced arguments; keep rather than guess at the key
+        return True
+    compound = _RE_COMBINATOR.split(selector.strip())[-1]
+    compound = compound.split(':', 1)[0]
+
+    tag = _RE_KEY_TAG.match(compound)
+    if tag and tag.group().lower() not in elements:
+        return False
+    if not classes.issuperset(_RE_KEY_CLASS.findall(compound)):
+        return False
+    return ids.issuperset(_RE_KEY_ID.findall(compound))
+
+
+def filter_css_by_key_selector(css_content: str, elements: FrozenSet[str],
+                               classes: FrozenSet[str], ids: FrozenSet[str]) -> str:
+    """
+    Keep the CSS rules whose key selector could match an element with the
+    given tag, class and id names. At-rules (@media, @font-face, ...) are
+    kept whole.
+    """
+    kept_rules = []
+    total_rules = 0
+    for rule, start, end in _iter_rules(css_content):
+        total_rules += 1
+        if rule.startswith('@') or any(
+            _key_selector_matches(selector.strip(), elements, classes, ids)
+            for selector in rule.split(',')
+        ):
+            kept_rules.append(css_content[start:end])
+
+    logger.info("      ✅ Key-selector filtering: %d/%d rules kept", len(kept_rules), total_rules)
+    return "\n".join(kept_rules)
@@ -4,6 +4,33 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Fenced code blocks; IGNORECASE also covers ```HTML / ```CSS fences
+_RE_HTML_FENCE = re.compile(r'```html\s*\n(.*?)\n```', re.DOTALL | re.IGNORECASE)
+_RE_CSS_FENCE = re.compile(r'```css\s*\n(.*?)\n```', re.DOTALL | re.IGNORECASE)
+_RE_STYLE_TAG = re.compile(r'<style[^>]*>(.*?)</style>', re.DOTALL | re.IGNORECASE)
+
+_RE_HTML_LIKE = re.compile(r'<[^>]+>.*?</[^>]+>', re.DOTALL)
+_RE_CSS_RULE = re.compile(r'[.#]?[a-zA-Z][a-zA-Z0-9_-]*\s*\{[^}]*\}')
+_RE_CSS_BLOCK = re.compile(r'\{[^}]*\}')
+
+# Document fragments placed around the CSS and HTML by combine_html_and_css
+_DOCUMENT_PREFIX = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Cloned Website</title>
+    <style>
+"""
+_DOCUMENT_BODY = """
+    </style>
+</head>
+<body>
+"""
+_DOCUMENT_SUFFIX = """
+</body>
+</html>"""
+
 
 def extract_code_blocks(text: str) -> Tuple[str, str]:
     """
@@ -14,87 +41,69 @@ def extract_code_blocks(text: str) -> Tuple[str, str]:
     html_code = ""
     css_code = ""
     
-    # Find HTML code block - try multiple patterns
-    html_patterns = [
-        r'```html\s*\n(.*?)\n```',
-        r'```HTML\s*\n(.*?)\n```',
-        r'<html.*?</html>',
-        r'<!DOCTYPE html.*?</html>',
-        r'<html[^>]*>.*?</html>',
-        r'<!DOCTYPE[^>]*>.*?</html>'
-    ]
+    # Cheap literal checks decide whether a regex can match at all
+    lower = text.lower()
     
-    for pattern in html_patterns:
-        try:
-            html_match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-            if html_match and html_match.groups():
-                html_code = html_match.group(1).strip()
-                logger.info(f"      ✅ HTML code block found: {len(html_code)} characters")
-                break
-        except (IndexError, AttributeError) as e:
-            logger.warning(f"      ⚠️  Error extracting HTML with pattern {pattern}: {e}")
-            continue
+    # Find fenced HTML code block
+    if '```html' in lower:
+        html_match = _RE_HTML_FENCE.search(text)
+        if html_match:
+            html_code = html_match.group(1).strip()
+            logger.info("      ✅ HTML code block found: %d characters", len(html_code))
     
     if not html_code:
         # Try to find any HTML-like content
-        html_like = re.search(r'<[^>]+>.*?</[^>]+>', text, re.DOTALL)
+        html_like = _RE_HTML_LIKE.search(text) if '</' in text else None
         if html_like:
             html_code = html_like.group(0)
-            logger.info(f"      ✅ HTML-like content found: {len(html_code)} characters")
+            logger.info("      ✅ HTML-like content found: %d characters", len(html_code))
         else:
             logger.warning("      ⚠️  No HTML code block found")
     
-    # Find CSS code block - try multiple patterns
-    css_patterns = [
-        r'```css\s*\n(.*?)\n```',
-        r'```CSS\s*\n(.*?)\n```',
-        r'<style[^>]*>(.*?)</style>',
-        r'/\*.*?\*/.*?\{.*?\}',  # Look for CSS rules with comments
-    ]
-    
-    for pattern in css_patterns:
-        try:
-            css_match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-            if css_match and css_match.groups():
-                css_code = css_match.group(1).strip()
-                logger.info(f"      ✅ CSS code block found: {len(css_code)} characters")
-                break
-        except (IndexError, AttributeError) as e:
-            logger.warning(f"      ⚠️  Error extracting CSS with pattern {pattern}: {e}")
-            continue
+    # Find fenced CSS code block, then an inline <style> tag
+    css_match = None
+    if '```css' in lower:
+        css_match = _RE_CSS_FENCE.search(text)
+    if not css_match and '<style' in lower:
+        css_match = _RE_STYLE_TAG.search(text)
+    if css_match:
+        css_code = css_match.group(1).strip()
+        logger.info("      ✅ CSS code block found: %d characters", len(css_code))
     
-    if not css_code:
+    if not css_code and '{' in text:
         # Try to extract any CSS-like content as fallback
         try:
             # Look for CSS rules in the text
-            css_rules = re.findall(r'[.#]?[a-zA-Z][a-zA-Z0-9_-]*\s*\{[^}]*\}', text)
+            css_rules = _RE_CSS_RULE.findall(text)
             if css_rules:
                 css_code = '\n'.join(css_rules)
-                logger.info(f"      ✅ CSS-like content found: {len(css_code)} characters")
+                logger.info("      ✅ CSS-like content found: %d characters", len(css_code))
             else:
                 # Look for any content that might be CSS
-                css_sections = re.findall(r'\{[^}]*\}', text)
+                css_sections = _RE_CSS_BLOCK.findall(text)
                 if css_sections:
                     css_code = '\n'.join(css_sections)
-                    logger.info(f"      ✅ CSS sections found: {len(css_code)} characters")
+                    logger.info("      ✅ CSS sections found: %d characters", len(css_code))
                 else:
                     logger.warning("      ⚠️  No CSS code block found")
         except Exception as e:
-            logger.warning(f"      ⚠️  Error extracting CSS-like content: {e}")
+            logger.warning("      ⚠️  Error extracting CSS-like content: %s", e)
+    elif not css_code:
+        logger.warning("      ⚠️  No CSS code block found")
     
     # If still no content, try to extract from the entire response
     if not html_code and not css_code:
         logger.warning("      ⚠️  No code blocks found, trying to extract from full response")
         # Look for HTML structure in the entire response
-        if '<html' in text.lower() or '<!doctype' in text.lower():
+        if '<html' in lower or '<!doctype' in lower:
             # Extract everything that looks like HTML
-            html_start = text.lower().find('<html')
+            html_start = lower.find('<html')
             if html_start == -1:
-                html_start = text.lower().find('<!doctype')
+                html_start = lower.find('<!doctype')
             
             if html_start != -1:
                 html_code = text[html_start:]
-                logger.info(f"      ✅ Extracted HTML from full response: {len(html_code)} characters")
+                logger.info("      ✅ Extracted HTML from full response: %d characters", len(html_code))
     
     return html_code, css_code
 
@@ -112,16 +121,14 @@ def inline_css(html: str, css: str) -> str:
     # Check if HTML has a head tag
     if '<head>' in html:
         # Insert style tag in head
-        style_tag = f'<style>\n{css}\n</style>'
-        html = html.replace('<head>', f'<head>\n{style_tag}')
+        html = html.replace('<head>', '<head>\n<style>\n' + css + '\n</style>', 1)
         logger.info("      ✅ CSS inlined into existing <head> tag")
     else:
         # If no head tag, add one with style
-        style_tag = f'<head>\n<style>\n{css}\n</style>\n</head>'
-        html = html.replace('<html>', f'<html>\n{style_tag}')
+        html = html.replace('<html>', '<html>\n<head>\n<style>\n' + css + '\n</style>\n</head>', 1)
         logger.info("      ✅ CSS inlined with new <head> tag")
     
-    logger.info(f"      ✅ CSS inlining complete: {len(html)} characters")
+    logger.info("      ✅ CSS inlining complete: %d characters", len(html))
     return html
 
 
@@ -136,26 +143,13 @@ def combine_html_and_css(html: str, css: str) -> str:
         return ""
     
     # If HTML doesn't have proper structure, wrap it
-    if not html.strip().startswith('<!DOCTYPE html>') and not html.strip().startswith('<html'):
-        html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Cloned Website</title>
-    <style>
-{css}
-    </style>
-</head>
-<body>
-{html}
-</body>
-</html>"""
+    if not html.lstrip().startswith(('<!DOCTYPE html>', '<html')):
+        html = ''.join((_DOCUMENT_PREFIX, css, _DOCUMENT_BODY, html, _DOCUMENT_SUFFIX))
         logger.info("      ✅ HTML wrapped with complete document structure")
     else:
         # Inline CSS into existing HTML
         html = inline_css(html, css)
         logger.info("      ✅ CSS inlined into existing HTML structure")
     
-    logger.info(f"      ✅ HTML and CSS combined: {len(html)} characters")
+    logger.info("      ✅ HTML and CSS combined: %d characters", len(html))
     return html 
\ No newline at end of file
@@ -5,6 +5,14 @@ import re
 from pathlib import Path
 import asyncio
 import os
+import functools
+import hashlib
+import logging
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,7 +25,7 @@ import uvicorn
 import anthropic  # Anthropic SDK
 
 # import our helper modules
-from scraper import scrape_website
+from scraper import scrape_website, close_http_session, browser_pool
 from filter_css import filter_css_from_html_and_css
 from recreate_site import (
     build_summary_and_minimal_html,
@@ -25,13 +33,74 @@ from recreate_site import (
     format_prompt
 )
 from inline_css import inline_css
-from section_processor import SectionProcessor
+from section_processor import SectionProcessor, shutdown_css_pool
+
+logger = logging.getLogger(__name__)
+
+# Code fences in Claude's fallback output, compiled once at import
+_FENCES = re.compile(r"```(html|css)\s*(.*?)\s*```", re.DOTALL)
+_CSS_TAIL_RE = re.compile(r"```css\s*(.*)$", re.DOTALL)
+
+# Generated results keyed by sha256 of (normalized url, html, css); LRU-bounded since
+# each entry holds a full page of generated HTML
+_RESULT_CACHE_SIZE = 32
+_result_cache: "OrderedDict[str, dict]" = OrderedDict()
+
+
+@functools.lru_cache(maxsize=1)
+def _anthropic_client() -> anthropic.AsyncAnthropic:
+    """Shared async client, so requests reuse one connection pool."""
+    return anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+
+
+@functools.lru_cache(maxsize=1)
+def _cpu_pool() -> ProcessPoolExecutor:
+    """Worker processes for GIL-bound HTML/CSS work, so it doesn't stall the loop."""
+    # spawn rather than fork: the server process runs threads and a browser
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+async def _run_cpu(fn, *args):
+    """Run a picklable CPU-bound call in the worker pool."""
+    return await asyncio.get_running_loop().run_in_executor(_cpu_pool(), fn, *args)
+
+
+def _normalize_url(url: str) -> str:
+    """
+    Cache form of a URL: lowercase scheme and host, sorted query
+    parameters, no fragment.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, ""))
+
+
+def _process_site_conservatively(full_html: str, raw_css: str, url: str) -> dict:
+    # Module-level so it can be sent to a pool worker
+    return SectionProcessor().process_entire_site_conservatively(full_html, raw_css, url)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release the shared browsers, HTTP session and worker pools on shutdown."""
+    try:
+        yield
+    finally:
+        await browser_pool.shutdown()
+        await close_http_session()
+        if _cpu_pool.cache_info().currsize:
+            _cpu_pool().shutdown(cancel_futures=True)
+        shutdown_css_pool()
 
 
 app = FastAPI(
     title="Orchids Challenge API",
     description="Backend with a /generate endpoint that reuses scraper, filter_css, recreate_site, inline_css",
     version="1.2.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -71,24 +140,35 @@ async def generate(payload: URLSubmit):
 
     # Create "generated" folder if not already present
     gen_dir = Path("generated")
-    gen_dir.mkdir(exist_ok=True)
+    await asyncio.to_thread(gen_dir.mkdir, exist_ok=True)
 
     # ─── 2) Save raw context.json ─────────────────────────────
-    Path(gen_dir / "context.json").write_text(
-        json.dumps(context_dict, indent=2, default=str)
-    )
+    # Serialize and write off the event loop; the context holds the full page,
+    # so it's written compact rather than pretty-printed
+    context_json = await asyncio.to_thread(json.dumps, context_dict, separators=(",", ":"), default=str)
+    await asyncio.to_thread(Path(gen_dir / "context.json").write_text, context_json)
 
     # ─── 3) Use conservative approach to preserve original structure ─────────────────────────────
     full_html = context_dict.get("html", "")
     raw_css = context_dict.get("css_contents", "")
     
-    processor = SectionProcessor()
-    
-    # Use conservative approach by default - process entire site as one piece
-    result = processor.process_entire_site_conservatively(full_html, raw_css, url)
+    # Same page content as a recent request: reuse its result instead of
+    # running the whole Claude pipeline again
+    cache_key = hashlib.sha256(f"{_normalize_url(url)}\0{full_html}\0{raw_css}".encode("utf-8")).hexdigest()
+    result = _result_cache.get(cache_key)
+    if result is not None:
+        _result_cache.move_to_end(cache_key)
+        logger.info("   ⚡ Reusing cached result for %s", url)
+    else:
+        # Use conservative approach by default - process entire site as one piece
+        result = await _run_cpu(_process_site_conservatively, full_html, raw_css, url)
+        
+        _result_cache[cache_key] = result
+        if len(_result_cache) > _RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
     
     # Save the result
-    Path(gen_dir / "recreated_combined.html").write_text(result["combined_html"])
+    await asyncio.to_thread(Path(gen_dir / "recreated_combined.html").write_text, result["combined_html"])
     
     # ─── 4) Return JSON for your React frontend ─────────────────────────────
     return {
@@ -104,10 +184,10 @@ async def _fallback_generate(context_dict: dict, gen_dir: Path):
     # ─── 3) Filter CSS ─────────────────────────────
     full_html = context_dict.get("html", "")
     raw_css = context_dict.get("css_contents", "")
-    filtered_css = filter_css_from_html_and_css(full_html, raw_css)
+    filtered_css = await _run_cpu(filter_css_from_html_and_css, full_html, raw_css)
 
     # ─── 4) Build summary + minimal HTML snippet ─────────────────────────────
-    summary_json_obj, minimal_html = build_summary_and_minimal_html(context_dict)
+    summary_json_obj, minimal_html = await _run_cpu(build_summary_and_minimal_html, context_dict)
 
     # ─── 5) Build critical CSS from filtered CSS ─────────────────────────────
     critical_css = build_critical_css(filtered_css)
@@ -116,38 +196,38 @@ async def _fallback_generate(context_dict: dict, gen_dir: Path):
     prompt = format_prompt(summary_json_obj, minimal_html, critical_css)
 
     # ─── 7) Send prompt to Claude ─────────────────────────────
-    client = anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
-    response = client.messages.create(
+    response = await _anthropic_client().messages.create(
         model="claude-sonnet-4-20250514",
         messages=[{"role": "user", "content": prompt}],
         max_tokens=4096,
     )
 
     # ─── 8) Extract raw Claude output, then pull out HTML/CSS fences ─────────────────────────────
-    raw_output = "".join(part.text for part in response.content if hasattr(part, "text"))
-
-    def extract_code(block_type: str, text: str) -> str:
-        fence_pattern = rf"```{block_type}\s*(.*?)\s*```"
-        match = re.search(fence_pattern, text, re.DOTALL)
-        if match:
-            return match.group(1).strip()
-        if block_type == "css":
-            start_pattern = r"```css\s*(.*)$"
-            match2 = re.search(start_pattern, text, re.DOTALL)
-            if match2:
-                return match2.group(1).strip()
-        return ""
-
-    html_generated = extract_code("html", raw_output)
-    css_generated = extract_code("css", raw_output)
+    texts = [part.text for part in response.content if getattr(part, "text", None)]
+    raw_output = "".join(texts)
+    logger.info("   → Response length: %d chars across %d parts", len(raw_output), len(texts))
+
+    # One scan picks up the first html and first css fence
+    blocks = {}
+    for match in _FENCES.finditer(raw_output):
+        blocks.setdefault(match.group(1), match.group(2).strip())
+    
+    html_generated = blocks.get("html", "")
+    css_generated = blocks.get("css")
+    if css_generated is None:
+        # Unterminated CSS fence: take everything after it
+        match = _CSS_TAIL_RE.search(raw_output)
+        css_generated = match.group(1).strip() if match else ""
 
     # ─── 9) Inline CSS into the generated HTML ─────────────────────────────
     combined_html = inline_css(html_generated, css_generated)
 
     # Write files into "generated/"
-    Path(gen_dir / "recreated_page.html").write_text(html_generated)
-    Path(gen_dir / "styles.css").write_text(css_generated)
-    Path(gen_dir / "recreated_combined.html").write_text(combined_html)
+    await asyncio.gather(
+        asyncio.to_thread(Path(gen_dir / "recreated_page.html").write_text, html_generated),
+        asyncio.to_thread(Path(gen_dir / "styles.css").write_text, css_generated),
+        asyncio.to_thread(Path(gen_dir / "recreated_combined.html").write_text, combined_html),
+    )
 
     # ─── 10) Return JSON for your React frontend ─────────────────────────────
     return {
@@ -1,15 +1,59 @@
 import json
+import re
 from typing import Dict, Any
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Elements stripped from the HTML before it goes into the prompt
+_STRIPPED_TAGS = ["script", "noscript", "iframe", "object", "embed"]
 
-def build_summary_and_minimal_html(context_dict: Dict[str, Any]) -> tuple:
+# Prompt compaction: whitespace runs, HTML comments, and innermost CSS rules
+_RE_WHITESPACE = re.compile(r'\s+')
+_RE_HTML_COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+_RE_FLAT_CSS_RULE = re.compile(r'[^{}]*\{[^{}]*\}')
+
+
+def _dedupe_css_rules(css: str) -> str:
+    """
+    Drop repeated copies of identical top-level CSS rules, keeping the first.
+    Rules nested in @media/@supports blocks are left alone.
+    """
+    seen = set()
+    parts = []
+    depth = 0
+    pos = 0
+    for match in _RE_FLAT_CSS_RULE.finditer(css):
+        # Text between innermost rules only holds at-rule preludes and braces
+        gap = css[pos:match.start()]
+        depth += gap.count('{') - gap.count('}')
+        parts.append(gap)
+        pos = match.end()
+        
+        rule = match.group(0).strip()
+        if depth == 0:
+            if rule in seen:
+                continue
+            seen.add(rule)
+        parts.append(match.group(0))
+    
+    parts.append(css[pos:])
+    return ''.join(parts)
+
+
+def build_summary_and_minimal_html(
+    context_dict: Dict[str, Any],
+    *,
+    max_chars: int = 12000,
+    max_images: int = 15,
+) -> tuple:
     """
     Build a summary JSON object and focused HTML content from the scraped context.
+    
+    The focused HTML is capped at ``max_chars`` and the summary lists at most
+    ``max_images`` images.
     """
-    logger.info("      → Building summary and focused HTML content...")
+    logger.debug("      → Building summary and focused HTML content...")
     
     title = context_dict.get("title", "Untitled")
     images = context_dict.get("images", [])
@@ -20,17 +64,17 @@ def build_summary_and_minimal_html(context_dict: Dict[str, Any]) -> tuple:
     summary_json_obj = {
         "title": title,
         "image_count": len(images),
-        "images": images[:15],  # Include more images
+        "images": images[:max_images],
         "summary": summary
     }
-    logger.info(f"      → Summary created: {summary_json_obj}")
+    logger.debug("      → Summary created: %s", summary_json_obj)
     
     # Extract the most important parts of the HTML structure
     from bs4 import BeautifulSoup
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = BeautifulSoup(html_content, 'lxml')
     
     # Remove problematic elements but keep structure
-    for element in soup(["script", "noscript", "iframe", "object", "embed"]):
+    for element in soup(_STRIPPED_TAGS):
         element.decompose()
     
     # Extract key structural elements
@@ -53,7 +97,9 @@ def build_summary_and_minimal_html(context_dict: Dict[str, Any]) -> tuple:
         # Fallback to the full HTML
         focused_html = str(soup)
     
-    logger.info(f"      → Focused HTML content prepared: {len(focused_html)} characters")
+    focused_html = focused_html[:max_chars]
+    
+    logger.debug("      → Focused HTML content prepared: %d characters", len(focused_html))
     
     return summary_json_obj, focused_html
 
@@ -62,7 +108,7 @@ def build_critical_css(filtered_css: str) -> str:
     """
     Build critical CSS from filtered CSS content.
     """
-    logger.info("      → Building critical CSS...")
+    logger.debug("      → Building critical CSS...")
     
     if not filtered_css:
         logger.warning("      ⚠️  No filtered CSS provided")
@@ -74,19 +120,32 @@ def build_critical_css(filtered_css: str) -> str:
     # - Prioritize above-the-fold styles
     # - Remove unused or redundant rules
     
-    logger.info(f"      ✅ Critical CSS created: {len(filtered_css)} characters")
+    logger.info("      ✅ Critical CSS created: %d characters", len(filtered_css))
     return filtered_css
 
 
-def format_prompt(summary_json_obj: Dict[str, Any], focused_html: str, critical_css: str) -> str:
+def format_prompt(
+    summary_json_obj: Dict[str, Any],
+    focused_html: str,
+    critical_css: str,
+    *,
+    max_html_chars: int = 12000,
+    max_css_chars: int = 8000,
+) -> str:
     """
     Format a prompt for Claude to recreate the website.
     """
-    logger.info("      → Formatting prompt for Claude AI...")
-    
-    # Send focused content that fits within token limits
-    html_preview = focused_html[:12000]  # Send more focused HTML
-    css_preview = critical_css[:8000]    # Send more CSS
+    logger.debug("      → Formatting prompt for Claude AI...")
+    
+    # Send focused content that fits within token limits; comments, whitespace
+    # runs and duplicate rules only cost tokens
+    html_preview = _RE_WHITESPACE.sub(' ', _RE_HTML_COMMENT.sub('', focused_html[:max_html_chars]))
+    css_preview = _dedupe_css_rules(critical_css[:max_css_chars])
+    logger.debug(
+        "      → Prompt content compacted: HTML %d → %d, CSS %d → %d characters",
+        min(len(focused_html), max_html_chars), len(html_preview),
+        min(len(critical_css), max_css_chars), len(css_preview),
+    )
     
     prompt = f"""
 You are an expert web developer creating an EXACT replica of a website. Study the provided HTML structure and CSS styles carefully, then recreate the website with identical appearance and layout.
@@ -148,5 +207,5 @@ IMPORTANT:
 - Do not include any text outside of the code blocks
 """
     
-    logger.info(f"      ✅ Prompt formatted: {len(prompt)} characters")
+    logger.info("      ✅ Prompt formatted: %d characters", len(prompt))
     return prompt 
\ No newline at end of file
@@ -1,16 +1,35 @@
 import asyncio
+import codecs
 import aiohttp
 from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Iterable, Optional
 import re
-import json
 import logging
+import time
+from collections import OrderedDict
 from urllib.parse import urlparse, urljoin
 
 logger = logging.getLogger(__name__)
 
+_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+# Cap on image URLs kept per page; downstream only ever uses the first few
+MAX_IMAGES = 64
+
+# Below this size a fetched page is almost certainly a JS bootstrap shell
+_MIN_STATIC_HTML = 2048
+
+# Empty SPA mount points (React, Vue, Next.js, Gatsby) mean client-side rendering
+_RE_EMPTY_APP_ROOT = re.compile(
+    r'<div[^>]*\bid=["\'](?:root|app|__next|___gatsby)["\'][^>]*>\s*</div>',
+    re.IGNORECASE,
+)
+
 
 class ScrapedContext(BaseModel):
     title: str
@@ -21,192 +40,508 @@ class ScrapedContext(BaseModel):
     url: str
 
 
-async def scrape_website(url: str) -> ScrapedContext:
+_http_session: Optional[aiohttp.ClientSession] = None
+_http_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_http_session() -> aiohttp.ClientSession:
     """
-    Scrape a website and extract HTML, CSS, and metadata.
+    Shared pooled session for page and stylesheet fetches, so keep-alive
+    connections and DNS lookups carry over between scrapes.
     """
-    logger.info(f"   🕷️  Starting Playwright browser for {url}")
-    async with async_playwright() as p:
-        logger.info("   → Launching Chromium browser...")
-        browser = await p.chromium.launch(headless=True)
-        logger.info("   ✅ Browser launched successfully")
-        
-        logger.info("   → Creating new page...")
-        page = await browser.new_page()
-        logger.info("   ✅ Page created")
-        
-        try:
-            # Navigate to the page
-            logger.info(f"   → Navigating to {url}...")
-            await page.goto(url, wait_until="networkidle")
-            logger.info("   ✅ Navigation completed")
-            
-            # Get the HTML content
-            logger.info("   → Extracting HTML content...")
-            html = await page.content()
-            logger.info(f"   ✅ HTML extracted: {len(html)} characters")
-            
-            # Parse with BeautifulSoup
-            logger.info("   → Parsing HTML with BeautifulSoup...")
-            soup = BeautifulSoup(html, 'html.parser')
-            logger.info("   ✅ HTML parsed successfully")
-            
-            # Extract title
-            logger.info("   → Extracting page title...")
-            title = soup.title.string if soup.title else "Untitled"
-            logger.info(f"   ✅ Title extracted: {title}")
-            
-            # Extract images
-            logger.info("   → Extracting images...")
-            images = []
-            for img in soup.find_all('img'):
-                src = img.get('src')
-                if src:
-                    # Convert relative URLs to absolute URLs
-                    if src.startswith('//'):
-                        img_url = f"https:{src}"
-                    elif src.startswith('/'):
-                        # Get the base URL
-                        parsed_url = urlparse(url)
-                        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-                        img_url = f"{base_url}{src}"
-                    elif src.startswith('http'):
-                        img_url = src
-                    else:
-                        # Relative URL
-                        img_url = urljoin(url, src)
-                    
-                    images.append(img_url)
-            logger.info(f"   ✅ Images extracted: {len(images)} found")
-            if images:
-                logger.info(f"   → Sample images: {images[:3]}")
-            
-            # Extract CSS
-            logger.info("   → Extracting inline CSS...")
-            css_contents = ""
-            for style in soup.find_all('style'):
-                css_contents += style.get_text() + "\n"
-            logger.info(f"   ✅ Inline CSS extracted: {len(css_contents)} characters")
-            
-            # Extract external CSS
-            logger.info("   → Extracting external CSS...")
-            external_css_count = 0
-            css_files_processed = 0
+    global _http_session, _http_session_loop
+    loop = asyncio.get_running_loop()
+    # A session is tied to the loop it was created on (asyncio.run() in CLIs
+    # makes a new loop per call)
+    if _http_session is None or _http_session.closed or _http_session_loop is not loop:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300)
+        )
+        _http_session_loop = loop
+    return _http_session
+
+
+async def close_http_session() -> None:
+    """
+    Close the shared session; call on application shutdown.
+    """
+    global _http_session, _http_session_loop
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+    _http_session_loop = None
+
+
+# Recently fetched (already truncated) stylesheets: url -> (fetched_at, css).
+# Bounded LRU with a short TTL, so shared CDN/framework CSS is fetched once
+# across scrapes without serving stale copies for long.
+_CSS_CACHE_SIZE = 256
+_CSS_CACHE_TTL = 300
+
+# Per-stylesheet download cap
+_MAX_CSS_BYTES = 15000
+_css_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+async def _fetch_css(session: aiohttp.ClientSession, css_url: str) -> str:
+    """
+    Fetch one external stylesheet, returning an empty string on failure.
+    """
+    cached = _css_cache.get(css_url)
+    if cached is not None:
+        fetched_at, external_css = cached
+        if time.monotonic() - fetched_at < _CSS_CACHE_TTL:
+            _css_cache.move_to_end(css_url)
+            logger.info("   ✅ External CSS from cache: %s", css_url)
+            return external_css
+        del _css_cache[css_url]
+    
+    try:
+        logger.debug("   → Fetching external CSS: %s", css_url)
+        async with session.get(css_url, timeout=aiohttp.ClientTimeout(total=15)) as response:
+            if response.status != 200:
+                logger.warning("   ⚠️  Failed to fetch CSS from %s: %s", css_url, response.status)
+                return ""
             
-            for link in soup.find_all('link', rel='stylesheet'):
-                if css_files_processed >= 8:  # Increased from 5 to 8 files
-                    logger.info(f"   → Skipping additional CSS files (limit reached)")
+            # Limit each CSS file to 15KB (increased from 10KB); stop reading
+            # once past the cap instead of downloading whole bundles
+            body = bytearray()
+            async for chunk in response.content.iter_chunked(65536):
+                body += chunk
+                if len(body) > _MAX_CSS_BYTES:
                     break
-                    
-                href = link.get('href')
-                if href:
-                    # Convert relative URLs to absolute URLs
-                    if href.startswith('//'):
-                        css_url = f"https:{href}"
-                    elif href.startswith('/'):
-                        # Get the base URL
-                        parsed_url = urlparse(url)
-                        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-                        css_url = f"{base_url}{href}"
-                    elif href.startswith('http'):
-                        css_url = href
-                    else:
-                        # Relative URL
-                        css_url = urljoin(url, href)
-                    
-                    try:
-                        logger.info(f"   → Fetching external CSS: {css_url}")
-                        async with aiohttp.ClientSession() as session:
-                            async with session.get(css_url, timeout=15) as response:
-                                if response.status == 200:
-                                    external_css = await response.text()
-                                    # Limit each CSS file to 15KB (increased from 10KB)
-                                    if len(external_css) > 15000:
-                                        external_css = external_css[:15000]
-                                        logger.info(f"   ⚠️  CSS file truncated to 15KB")
-                                    
-                                    css_contents += external_css + "\n"
-                                    external_css_count += 1
-                                    logger.info(f"   ✅ External CSS fetched: {len(external_css)} characters")
-                                else:
-                                    logger.warning(f"   ⚠️  Failed to fetch CSS from {css_url}: {response.status}")
-                    except Exception as e:
-                        logger.warning(f"   ⚠️  Error fetching CSS from {css_url}: {e}")
-                        pass  # Skip if external CSS can't be loaded
-                
-                css_files_processed += 1
-            
-            logger.info(f"   ✅ External CSS processed: {external_css_count} files")
-            logger.info(f"   → Total CSS content: {len(css_contents)} characters")
-            
-            # Also extract computed styles from the page
-            logger.info("   → Extracting computed styles...")
-            try:
-                # Get computed styles for key elements
-                computed_styles = await page.evaluate("""
-                    () => {
-                        const styles = {};
-                        const elements = document.querySelectorAll('*');
-                        elements.forEach((el, index) => {
-                            if (index < 100) { // Limit to first 100 elements
-                                const computed = window.getComputedStyle(el);
-                                const tagName = el.tagName.toLowerCase();
-                                const className = el.className;
-                                const id = el.id;
-                                
-                                if (className || id) {
-                                    const selector = id ? `#${id}` : `.${className.split(' ')[0]}`;
-                                    if (!styles[selector]) {
-                                        styles[selector] = {
-                                            'background-color': computed.backgroundColor,
-                                            'color': computed.color,
-                                            'font-family': computed.fontFamily,
-                                            'font-size': computed.fontSize,
-                                            'margin': computed.margin,
-                                            'padding': computed.padding,
-                                            'display': computed.display,
-                                            'position': computed.position
-                                        };
-                                    }
-                                }
+            charset = response.charset or 'utf-8'
+            # The charset comes from the server's Content-Type; an unknown
+            # one would raise LookupError when decoding below
+            codecs.lookup(charset)
+    except LookupError:
+        logger.warning("   ⚠️  Unknown charset %r for %s, decoding as UTF-8", charset, css_url)
+        charset = 'utf-8'
+    except Exception as e:
+        logger.warning("   ⚠️  Error fetching CSS from %s: %s", css_url, e)
+        return ""  # Skip if external CSS can't be loaded
+    
+    if len(body) > _MAX_CSS_BYTES:
+        # A cut multi-byte character at the end is dropped rather than replaced
+        external_css = body[:_MAX_CSS_BYTES].decode(charset, errors='ignore')
+        logger.info("   ⚠️  CSS file truncated to 15KB")
+    else:
+        external_css = body.decode(charset, errors='replace')
+    
+    logger.info("   ✅ External CSS fetched: %d characters", len(external_css))
+    _css_cache[css_url] = (time.monotonic(), external_css)
+    if len(_css_cache) > _CSS_CACHE_SIZE:
+        _css_cache.popitem(last=False)
+    return external_css
+
+
+async def _fetch_html(session: aiohttp.ClientSession, url: str) -> Optional[str]:
+    """
+    Fetch the page over plain HTTP, returning None if it can't be used.
+    """
+    try:
+        async with session.get(
+            url,
+            headers={"User-Agent": _USER_AGENT},
+            timeout=aiohttp.ClientTimeout(total=15),
+        ) as response:
+            if response.status != 200 or "html" not in response.content_type:
+                logger.debug("   → HTTP fetch not usable: %s %s", response.status, response.content_type)
+                return None
+            return await response.text()
+    except Exception as e:
+        logger.debug("   → HTTP fetch failed: %s", e)
+        return None
+
+
+def _needs_browser(html: str) -> bool:
+    """
+    Cheap check for pages that only render their content with JavaScript.
+    """
+    return len(html) < _MIN_STATIC_HTML or _RE_EMPTY_APP_ROOT.search(html) is not None
+
+
+# Page assets read straight from a rendered DOM; img.src/link.href are
+# already absolute, and images are deduped and capped in the page
+_DOM_ASSETS_SCRIPT = """
+    (maxImages) => {
+        const images = [];
+        const seen = new Set();
+        for (const img of document.querySelectorAll('img[src]')) {
+            if (!img.getAttribute('src') || seen.has(img.src)) continue;
+            seen.add(img.src);
+            images.push(img.src);
+            if (images.length >= maxImages) break;
+        }
+        return {
+            title: document.title,
+            images: images,
+            inline: Array.from(document.querySelectorAll('style'), s => s.textContent).filter(Boolean),
+            stylesheets: Array.from(
+                document.querySelectorAll('link[rel~="stylesheet"][href]'),
+                link => link.getAttribute('href') ? link.href : ''
+            ).filter(Boolean)
+        };
+    }
+"""
+
+
+def _first_unique(urls: Iterable[str], limit: int) -> List[str]:
+    """
+    The first ``limit`` distinct URLs, in order; stops consuming ``urls`` there.
+    """
+    unique = {}  # ordered set
+    for item in urls:
+        unique[item] = None
+        if len(unique) >= limit:
+            break
+    return list(unique)
+
+
+def _resolve_url(base_url: str, page_url: str, src: str) -> str:
+    """
+    Absolute form of an image or stylesheet reference on ``page_url``.
+    ``base_url`` is the page's ``scheme://netloc``, computed once per page.
+    """
+    head = src[:2]
+    if head == '//':
+        return f"https:{src}"
+    if head[:1] == '/':
+        return base_url + src
+    if src.startswith('http'):
+        return src
+    # Relative URL
+    return urljoin(page_url, src)
+
+
+def _assets_from_soup(soup: BeautifulSoup, url: str) -> tuple:
+    """
+    Title, image URLs, inline CSS and stylesheet URLs from a parsed page.
+    The URL sequences resolve lazily, so callers can stop early.
+    """
+    title = soup.title.string if soup.title else None
+    
+    # Base URL for root-relative image and stylesheet links
+    parsed_url = urlparse(url)
+    base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+    
+    # One walk over the tree collects every tag the steps below need
+    img_tags, style_tags, stylesheet_links = [], [], []
+    for tag in soup.find_all(['img', 'style', 'link']):
+        if tag.name == 'img':
+            if tag.get('src'):
+                img_tags.append(tag)
+        elif tag.name == 'style':
+            style_tags.append(tag)
+        elif 'stylesheet' in tag.get('rel', ()) and tag.get('href'):
+            stylesheet_links.append(tag)
+    
+    image_urls = (_resolve_url(base_url, url, img['src']) for img in img_tags)
+    stylesheet_urls = (
+        _resolve_url(base_url, url, link['href'])
+        for link in stylesheet_links
+    )
+    
+    css_parts = []
+    for style in style_tags:
+        # <style> is nearly always a single text node; skip get_text()'s walk
+        css = style.string or ''.join(style.strings)
+        if css:
+            css_parts.append(css)
+    
+    return title, image_urls, css_parts, stylesheet_urls
+
+
+async def _extract_context(
+    url: str,
+    html: Optional[str],
+    session: aiohttp.ClientSession,
+    page=None,
+    *,
+    max_css_files: int = 8,
+    extract_computed_styles: bool = True,
+) -> ScrapedContext:
+    """
+    Build the scraped context for a page. With a rendered Playwright page the
+    assets are read from its live DOM and computed styles are collected
+    (unless ``extract_computed_styles`` is off), and ``html`` is serialized
+    from the page last; otherwise ``html`` is parsed.
+    """
+    if page is not None:
+        # The browser has already parsed the DOM and resolved every URL
+        logger.debug("   → Reading page assets from the rendered DOM...")
+        assets = await page.evaluate(_DOM_ASSETS_SCRIPT, MAX_IMAGES)
+        title = assets['title']
+        image_urls = assets['images']
+        css_parts = assets['inline']
+        stylesheet_urls = assets['stylesheets']
+    else:
+        # Parse with BeautifulSoup
+        logger.debug("   → Parsing HTML with BeautifulSoup...")
+        soup = BeautifulSoup(html, 'lxml')
+        logger.debug("   ✅ HTML parsed successfully")
+        title, image_urls, css_parts, stylesheet_urls = _assets_from_soup(soup, url)
+    
+    title = title or "Untitled"
+    logger.info("   ✅ Title extracted: %s", title)
+    
+    # Extract images
+    images = _first_unique(image_urls, MAX_IMAGES)
+    logger.info("   ✅ Images extracted: %d found", len(images))
+    if images:
+        logger.debug("   → Sample images: %s", images[:3])
+    
+    logger.info("   ✅ Inline CSS extracted: %d characters", sum(map(len, css_parts)))
+    
+    # Extract external CSS; the same stylesheet linked twice is only fetched once
+    css_urls = _first_unique(stylesheet_urls, max_css_files)
+    
+    # Fetch all stylesheets concurrently over one pooled session; gather
+    # starts the downloads right away, so they run while computed styles
+    # are read below
+    css_fetch = asyncio.gather(
+        *(_fetch_css(session, css_url) for css_url in css_urls)
+    )
+    
+    # Also extract computed styles from the page (needs a rendered page)
+    computed_css = ""
+    if page is not None and extract_computed_styles:
+        logger.debug("   → Extracting computed styles...")
+        try:
+            # Get computed styles for key elements; the walk stops at the first
+            # 100 elements and the CSS text is assembled in the page, so only
+            # one string crosses back over the protocol
+            computed = await page.evaluate("""
+                () => {
+                    const props = {
+                        'background-color': 'backgroundColor',
+                        'color': 'color',
+                        'font-family': 'fontFamily',
+                        'font-size': 'fontSize',
+                        'margin': 'margin',
+                        'padding': 'padding',
+                        'display': 'display',
+                        'position': 'position'
+                    };
+                    const seen = new Set();
+                    const rules = [];
+                    // Walk elements in document order, same as querySelectorAll('*'),
+                    // without materializing the whole list
+                    const walker = document.createTreeWalker(document.documentElement, NodeFilter.SHOW_ELEMENT);
+                    let el = walker.currentNode;
+                    for (let i = 0; el && i < 100; i++, el = walker.nextNode()) { // Limit to first 100 elements
+                        const className = el.className;
+                        const id = el.id;
+                        if (!className && !id) continue;
+                        
+                        const selector = id ? `#${id}` : `.${className.split(' ')[0]}`;
+                        if (seen.has(selector)) continue;
+                        seen.add(selector);
+                        
+                        const computed = window.getComputedStyle(el);
+                        let rule = `\\n${selector} {\\n`;
+                        for (const [prop, key] of Object.entries(props)) {
+                            const value = computed[key];
+                            if (value && value !== 'initial' && value !== 'normal') {
+                                rule += `    ${prop}: ${value};\\n`;
                             }
-                        });
-                        return styles;
+                        }
+                        rules.push(rule + '}\\n');
                     }
-                """)
-                
-                # Convert computed styles to CSS
-                for selector, properties in computed_styles.items():
-                    css_contents += f"\n{selector} {{\n"
-                    for prop, value in properties.items():
-                        if value and value != 'initial' and value != 'normal':
-                            css_contents += f"    {prop}: {value};\n"
-                    css_contents += "}\n"
-                
-                logger.info(f"   ✅ Computed styles extracted: {len(computed_styles)} selectors")
-            except Exception as e:
-                logger.warning(f"   ⚠️  Error extracting computed styles: {e}")
-            
-            # Create summary
-            logger.info("   → Creating summary...")
-            summary = f"Website: {title}\nImages: {len(images)}\nCSS rules: {len(css_contents.split('}'))}"
-            logger.info(f"   ✅ Summary created: {summary}")
+                    return {css: rules.join(''), selectors: rules.length};
+                }
+            """)
+            computed_css = computed['css']
             
-            logger.info("   🎉 Scraping completed successfully!")
-            
-            return ScrapedContext(
-                title=title,
-                images=images,
-                summary=summary,
-                css_contents=css_contents,
-                html=html,
-                url=url
-            )
+            logger.info("   ✅ Computed styles extracted: %d selectors", computed['selectors'])
+        except Exception as e:
+            logger.warning("   ⚠️  Error extracting computed styles: %s", e)
+    
+    if page is not None:
+        # Serialized only for the returned context, after everything else has
+        # been read from the DOM and while the stylesheets are still downloading
+        logger.debug("   → Extracting HTML content...")
+        html = await page.content()
+        logger.info("   ✅ HTML extracted: %d characters", len(html))
+    
+    results = await css_fetch
+    external_css_files = [css for css in results if css]
+    
+    external_css_count = len(external_css_files)
+    css_parts.extend(external_css_files)
+    
+    # Each stylesheet ends with a newline; computed styles go last and
+    # everything is joined once, instead of growing a string
+    css_chunks = [f"{css}\n" for css in css_parts]
+    css_chunks.append(computed_css)
+    
+    logger.info("   ✅ External CSS processed: %d files", external_css_count)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("   → Total CSS content: %d characters", sum(map(len, css_chunks)))
+    
+    css_contents = "".join(css_chunks)
+    
+    # Create summary
+    logger.debug("   → Creating summary...")
+    summary = f"Website: {title}\nImages: {len(images)}\nCSS rules: {css_contents.count('}') + 1}"
+    logger.info("   ✅ Summary created: %s", summary)
+    
+    logger.info("   🎉 Scraping completed successfully!")
+    
+    return ScrapedContext(
+        title=title,
+        images=images,
+        summary=summary,
+        css_contents=css_contents,
+        html=html,
+        url=url
+    )
+
+
+# Chromium features a headless scraper never uses; dropping them shrinks
+# each pooled browser so more fit per host. /dev/shm is tiny in containers,
+# so shared memory goes to /tmp instead.
+_CHROMIUM_ARGS = (
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--disable-features=Translate,BackForwardCache,AcceptCHFrame",
+)
+
+
+class BrowserPool:
+    """
+    Warm Chromium instances shared by every scrape. Playwright and the
+    browsers are started lazily; each scrape opens its own BrowserContext,
+    so browsers are handed out round-robin rather than checked out.
+    """
+    
+    def __init__(self, size: int = 2):
+        self._size = size
+        self._playwright = None
+        self._browsers = []
+        self._next = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def acquire(self):
+        """
+        Return a connected browser, launching one if the pool isn't full yet.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Playwright objects belong to the loop that started them
+            self._playwright = None
+            self._browsers = []
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        
+        async with self._lock:
+            self._browsers = [b for b in self._browsers if b.is_connected()]
+            if len(self._browsers) < self._size:
+                if self._playwright is None:
+                    logger.debug("   → Starting Playwright...")
+                    self._playwright = await async_playwright().start()
+                logger.debug("   → Launching Chromium browser...")
+                self._browsers.append(await self._playwright.chromium.launch(headless=True, args=list(_CHROMIUM_ARGS)))
+                logger.info("   ✅ Browser launched (%d/%d in pool)", len(self._browsers), self._size)
+                return self._browsers[-1]
             
+            self._next = (self._next + 1) % len(self._browsers)
+            return self._browsers[self._next]
+    
+    async def shutdown(self) -> None:
+        """
+        Close every pooled browser and stop Playwright; call on application shutdown.
+        """
+        browsers, self._browsers = self._browsers, []
+        for browser in browsers:
+            if browser.is_connected():
+                await browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        logger.info("   ✅ Browser pool closed")
+
+
+browser_pool = BrowserPool()
+
+
+# Requests the scraper never needs rendered: the DOM keeps their URLs anyway
+_BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+
+async def _block_heavy_resources(route) -> None:
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def _scrape_rendered(url: str, browser, session: aiohttp.ClientSession, **options) -> ScrapedContext:
+    """
+    Render the page in a fresh browser context and extract from the live DOM.
+    """
+    logger.debug("   → Creating browser context...")
+    browser_context = await browser.new_context()
+    await browser_context.route("**/*", _block_heavy_resources)
+    page = await browser_context.new_page()
+    logger.debug("   ✅ Page created")
+    
+    try:
+        # Navigate to the page
+        logger.debug("   → Navigating to %s...", url)
+        await page.goto(url, wait_until="domcontentloaded", timeout=15000)
+        logger.debug("   ✅ Navigation completed")
+        
+        # Give late resources a moment, but don't wait on analytics/polling
+        # connections the way networkidle did
+        try:
+            await page.wait_for_load_state("load", timeout=3000)
+        except PlaywrightTimeoutError:
+            logger.debug("   → Load event still pending, continuing with current DOM")
+        
+        return await _extract_context(url, None, session, page, **options)
+        
+    except Exception as e:
+        logger.error("   ❌ Error during scraping: %s", e)
+        raise e
+    finally:
+        await browser_context.close()
+
+
+async def scrape_website(
+    url: str,
+    browser=None,
+    *,
+    max_css_files: int = 8,
+    extract_computed_styles: bool = True,
+) -> ScrapedContext:
+    """
+    Scrape a website and extract HTML, CSS, and metadata.
+    
+    Static and server-rendered pages are fetched over plain HTTP; Chromium
+    is only used for pages that need JavaScript to render, taken from
+    ``browser_pool`` unless a running Playwright ``browser`` is passed in.
+    At most ``max_css_files`` external stylesheets are downloaded, each
+    capped at ``_MAX_CSS_BYTES``.
+    """
+    options = dict(max_css_files=max_css_files, extract_computed_styles=extract_computed_styles)
+    session = _get_http_session()
+    
+    logger.debug("   → Fetching %s over HTTP...", url)
+    html = await _fetch_html(session, url)
+    if html is not None and not _needs_browser(html):
+        logger.info("   ⚡ Static HTML fetched: %d characters, skipping browser", len(html))
+        try:
+            return await _extract_context(url, html, session, **options)
         except Exception as e:
-            logger.error(f"   ❌ Error during scraping: {e}")
+            logger.error("   ❌ Error during scraping: %s", e)
             raise e
-        finally:
-            logger.info("   → Closing browser...")
-            await browser.close()
-            logger.info("   ✅ Browser closed") 
\ No newline at end of file
+    
+    if browser is None:
+        browser = await browser_pool.acquire()
+    logger.info("   🕷️  Rendering %s with a pooled browser", url)
+    return await _scrape_rendered(url, browser, session, **options)
@@ -12,7 +12,7 @@ import asyncio
 from pathlib import Path
 from section_processor import SectionProcessor
 
-def conservative_clone_website(url: str, output_dir: str = "generated") -> None:
+async def conservative_clone_website(url: str, output_dir: str = "generated") -> None:
     """
     Clone a website using the conservative approach.
     
@@ -30,11 +30,11 @@ def conservative_clone_website(url: str, output_dir: str = "generated") -> None:
     processor = SectionProcessor()
     
     # Perform conservative clone
-    result = processor.conservative_clone(url)
+    result = await processor.conservative_clone(url)
     
-    # Save the cloned website
+    # Save the cloned website; encode once and write bytes off the event loop
     html_file = output_path / "conservative_clone.html"
-    html_file.write_text(result["combined_html"])
+    await asyncio.to_thread(html_file.write_bytes, result["combined_html"].encode("utf-8"))
     
     print(f"✅ Conservative clone completed!")
     print(f"📁 Saved to: {html_file}")
@@ -53,7 +53,7 @@ def main():
     url = sys.argv[1]
     
     try:
-        conservative_clone_website(url)
+        asyncio.run(conservative_clone_website(url))
     except Exception as e:
         print(f"❌ Error during conservative clone: {e}")
         sys.exit(1)
@@ -23,7 +23,7 @@ class WebsiteContext(BaseModel):
     html: str
 
 def extract_important_pieces(html: str) -> dict:
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, "lxml")
 
     headings = [tag.get_text(strip=True) for tag in soup.find_all(["h1", "h2", "h3"])]
     buttons = [btn.get_text(strip=True) for btn in soup.find_all("button")]
@@ -60,21 +60,26 @@ def extract_important_pieces(html: str) -> dict:
     return summary
 
 async def download_stylesheets(stylesheet_urls: List[str]) -> str:
-    css_contents = []
     print("\n[DEBUG] Downloading stylesheets...")
-    async with aiohttp.ClientSession() as session:
-        for url in stylesheet_urls:
+    # At most 8 downloads in flight; results keep the page's stylesheet order
+    semaphore = asyncio.Semaphore(8)
+
+    async def fetch(session: aiohttp.ClientSession, url: str) -> str:
+        async with semaphore:
             try:
                 async with session.get(url, timeout=10) as response:
                     if response.status == 200:
                         text = await response.text()
-                        css_contents.append(text)
                         print(f"  ✅ Downloaded: {url}")
-                    else:
-                        print(f"  ❌ Failed ({response.status}): {url}")
+                        return text
+                    print(f"  ❌ Failed ({response.status}): {url}")
             except Exception as e:
                 print(f"  ❌ Error downloading {url}: {e}")
-    return "\n\n".join(css_contents)
+            return ""
+
+    async with aiohttp.ClientSession() as session:
+        results = await asyncio.gather(*(fetch(session, url) for url in stylesheet_urls))
+    return "\n\n".join(css for css in results if css)
 
 async def scrape_website(url: str) -> WebsiteContext:
     print(f"\n[DEBUG] Starting scrape for: {url}")
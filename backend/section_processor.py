@@ -1,19 +1,254 @@
 # backend/section_processor.py
 
+import asyncio
+import functools
+import io
+import itertools
 import json
+import logging
+import multiprocessing
 import re
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, List, Dict, FrozenSet, Iterator, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
 from dataclasses import dataclass
 import trafilatura
-from bs4 import BeautifulSoup
-from lxml import html
+from bs4 import BeautifulSoup, Tag
+import soupsieve as sv
+from html import escape
+from lxml import etree, html
+from lxml.html import soupparser
+from urllib.parse import urljoin, urlsplit
 import anthropic
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from app.filter_css import filter_css_by_key_selector
+
+logger = logging.getLogger(__name__)
+
+# Leading junk that lxml's document parser can't take from a str
+_RE_XML_DECLARATION = re.compile(r"\s*<\?xml[^>]*\?>", re.IGNORECASE)
+_RE_LEADING_DOCTYPE = re.compile(r"\s*(?:<!--.*?-->\s*)*(<!doctype[^>]*>)", re.IGNORECASE | re.DOTALL)
+# Marks a full page rather than a fragment; HTML5 lets pages omit <html>
+_RE_DOCUMENT_MARKER = re.compile(r"<!doctype|<(?:html|head|body)[\s/>]", re.IGNORECASE)
+# Wrapper that fragments are parsed inside, so top-level text survives
+_FRAGMENT_ROOT = "fragment-root"
+
+def _parse_markup(markup: str) -> Tuple[html.HtmlElement, Optional[str]]:
+    """
+    Parse a full page or a fragment into an lxml tree. Returns the root and
+    the page's doctype; fragments come back inside a wrapper element
+    (doctype None) that _serialize_markup leaves out again.
+    """
+    markup = markup.lstrip("\ufeff")
+    declaration = _RE_XML_DECLARATION.match(markup)
+    if declaration:
+        markup = markup[declaration.end():]
+    
+    if _RE_DOCUMENT_MARKER.search(markup):
+        doctype = _RE_LEADING_DOCTYPE.match(markup)
+        return html.document_fromstring(markup), doctype.group(1) if doctype else ""
+    
+    # lxml's fragment parser drops head-level tags (<style>, <link>, <meta>,
+    # <title>); BeautifulSoup keeps them where they are
+    wrapped = soupparser.fromstring(f"<{_FRAGMENT_ROOT}>{markup}</{_FRAGMENT_ROOT}>")
+    return wrapped.find(_FRAGMENT_ROOT), None
+
+def _serialize_markup(root: html.HtmlElement, doctype: Optional[str]) -> str:
+    """Inverse of _parse_markup"""
+    if doctype is None:
+        return escape(root.text or "", quote=False) + "".join(html.tostring(child, encoding="unicode") for child in root)
+    if not doctype:
+        return html.tostring(root, encoding="unicode")
+    return html.tostring(root, encoding="unicode", doctype=doctype)
+
+def _rewrite_markup(markup: str, fix: Callable[[html.HtmlElement], None]) -> str:
+    """
+    Parse markup, apply ``fix`` to the tree and serialize it again. A page
+    with no elements at all (e.g. a lone doctype) comes back unchanged.
+    """
+    try:
+        root, doctype = _parse_markup(markup)
+    except etree.ParserError:
+        return markup
+    fix(root)
+    return _serialize_markup(root, doctype)
+
+@functools.lru_cache(maxsize=8)
+def _split_base_url(original_url: str) -> Tuple[str, str]:
+    """Scheme and scheme://netloc of a page URL, parsed once per page"""
+    parts = urlsplit(original_url)
+    return parts.scheme, f"{parts.scheme}://{parts.netloc}"
+
+def _absolute_url(src: str, original_url: Optional[str]) -> str:
+    """Make an image URL absolute, against the original page when known"""
+    if original_url:
+        # Common shapes are resolved from the pre-split base; urljoin only
+        # handles path-relative URLs
+        if src.startswith(('http://', 'https://')):
+            return src
+        scheme, root = _split_base_url(original_url)
+        if src.startswith('//'):
+            return f"{scheme}:{src}"
+        if src.startswith('/'):
+            return root + src
+        return urljoin(original_url, src)
+    if src.startswith('http'):
+        return src
+    if src.startswith('/'):
+        return f"https://www.bu.edu{src}"
+    return f"https://www.bu.edu/{src}"
+
+def _absolute_srcset(srcset: str, original_url: Optional[str] = None) -> str:
+    """Make every URL in a srcset absolute, keeping the size descriptors"""
+    new_srcset = []
+    for src_item in srcset.split(','):
+        if ' ' in src_item:
+            url, size = src_item.strip().split(' ', 1)
+            new_srcset.append(f"{_absolute_url(url, original_url)} {size}")
+        else:
+            new_srcset.append(_absolute_url(src_item.strip(), original_url))
+    return ', '.join(new_srcset)
+
+def _markup_sizes(root: Tag) -> Dict[int, int]:
+    """
+    Approximate serialized length of ``root`` and every tag under it, keyed
+    by id(tag). One bottom-up pass, instead of str() on each subtree.
+    """
+    sizes = {}
+    # Reversed document order visits every tag after all of its descendants
+    for node in reversed([root, *root.descendants]):
+        if isinstance(node, Tag):
+            size = 2 * len(node.name) + 5  # <name></name>
+            for key, value in node.attrs.items():
+                if isinstance(value, list):
+                    value = ' '.join(value)
+                size += len(key) + len(value) + 4
+            for child in node.contents:
+                size += sizes[id(child)] if isinstance(child, Tag) else len(child)
+            sizes[id(node)] = size
+    return sizes
+
+# Comments and <script>/<style> bodies, which _fix_links_only steps over
+# whole: link-like text inside them isn't a link
+_OPAQUE_SPAN = r'(?P<opaque><!--.*?(?:-->|\Z)|<(?P<raw>(?i:script|style))\b.*?(?:</(?i:(?P=raw))\s*>|\Z))'
+# href/action values _fix_links_only rewrites without parsing
+# (names case-insensitive, "http" case-sensitive like the old startswith check;
+# a value runs to its own closing quote, so it may hold the other quote)
+_RE_EXTERNAL_HREF = re.compile(
+    _OPAQUE_SPAN + r'|(?P<attr><(?i:a)\b[^>]*?\s(?i:href)\s*=\s*)(?P<quote>["\'])http(?:(?!(?P=quote)).)*(?P=quote)',
+    re.DOTALL,
+)
+_RE_FORM_ACTION = re.compile(
+    _OPAQUE_SPAN + r'|(?P<attr><(?i:form)\b[^>]*?\s(?i:action)\s*=\s*)(?P<quote>["\'])(?:(?!(?P=quote)).)+(?P=quote)',
+    re.DOTALL,
+)
+_RE_UNQUOTED_LINK_ATTR = re.compile(r'\s(?:href|action)\s*=\s*[^"\'\s>]', re.IGNORECASE)
+
+def _neutralize_match(match: re.Match) -> str:
+    """Substitution for _RE_EXTERNAL_HREF/_RE_FORM_ACTION: opaque spans stay as they are"""
+    if match.group('opaque'):
+        return match.group()
+    quote = match.group('quote')
+    return f"{match.group('attr')}{quote}#{quote}"
+
+def _neutralize_link(element: html.HtmlElement) -> None:
+    """Point an external <a> or any <form> action at #"""
+    if element.tag == 'a':
+        if element.get('href', '').startswith('http'):
+            element.set('href', '#')
+    elif element.get('action'):
+        element.set('action', '#')
+
+def _link_targets(root: html.HtmlElement) -> Iterator[Tuple[html.HtmlElement, str]]:
+    """Every <a href> and <form action> under root, as (element, attribute)"""
+    for element in root.iter('a', 'form'):
+        attribute = 'href' if element.tag == 'a' else 'action'
+        if element.get(attribute) is not None:
+            yield element, attribute
+
+def _neutralize_links(root: html.HtmlElement) -> None:
+    """Point external links and every form action at #"""
+    for element in root.iter('a', 'form'):
+        _neutralize_link(element)
+
+# Fenced code blocks in Claude's section output, by language
+_CODE_BLOCK_RES = {
+    block_type: re.compile(f"```{block_type}\\n(.*?)```", re.DOTALL)
+    for block_type in ("html", "css")
+}
+
+# Document head for generated pages, up to the opening of its <style> block
+_COMBINED_HTML_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Recreated Website</title>
+    <style>
+"""
+
+# Sections in the order detect_sections emits them: (name, description, priority)
+_SECTION_INFO = (
+    ("header", "Site header with navigation and branding", 2),
+    ("hero", "Hero banner or main promotional section", 2),
+    ("main-content", "Main content area with primary information", 1),
+    ("sidebar", "Sidebar with secondary navigation or content", 3),
+    ("footer", "Site footer with links and information", 4),
+)
+
+# Below this many characters of CSS, per-section filtering stays in-process:
+# shipping the stylesheet to workers would cost more than filtering it
+_PARALLEL_CSS_MIN_CHARS = 100_000
+
+@functools.lru_cache(maxsize=1)
+def _css_pool() -> ProcessPoolExecutor:
+    """Worker processes for per-section CSS filtering, started on first use"""
+    return ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+
+def shutdown_css_pool() -> None:
+    """Stop the CSS filtering workers, if any were started; call on app shutdown"""
+    if _css_pool.cache_info().currsize:
+        _css_pool().shutdown(cancel_futures=True)
+        _css_pool.cache_clear()
+
+# Claude requests in flight at once while processing sections
+_MAX_CONCURRENT_SECTIONS = 3
+
+# CSS selectors for each section, most specific first
+_SECTION_SELECTORS = {
+    "header": (
+        'header', '[role="banner"]', '.header', '.site-header',
+        '.main-header', '.navigation', 'nav', '.nav'
+    ),
+    "hero": (
+        '.hero', '.banner', '.jumbotron', '.hero-section',
+        '.main-banner', '[class*="hero"]', '[class*="banner"]'
+    ),
+    "sidebar": (
+        'aside', '[role="complementary"]', '.sidebar', '.side-nav',
+        '.secondary', '.widget-area'
+    ),
+    "footer": (
+        'footer', '[role="contentinfo"]', '.footer', '.site-footer',
+        '.main-footer'
+    ),
+}
+
+# Compiled once: a matcher per selector, and one selector list matching any
+# of them so the tree is only walked once
+_SECTION_MATCHERS = {
+    name: [sv.compile(selector) for selector in selectors]
+    for name, selectors in _SECTION_SELECTORS.items()
+}
+_ANY_SECTION = sv.compile(", ".join(
+    selector for selectors in _SECTION_SELECTORS.values() for selector in selectors
+))
+
 @dataclass
 class WebsiteSection:
     """Represents a detected section of a website"""
@@ -25,14 +260,15 @@ class WebsiteSection:
 
 class SectionProcessor:
     def __init__(self):
-        self.client = anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+        self.client = anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
     
-    def conservative_clone(self, url: str) -> Dict[str, str]:
+    async def conservative_clone(self, url: str) -> Dict[str, str]:
         """
         Conservative website cloning approach.
         
         This method preserves the original HTML structure and CSS exactly as-is,
         only making minimal technical fixes needed for standalone functionality.
+        Synchronous callers wrap it in asyncio.run at their entry point.
         
         Args:
             url: The website URL to clone
@@ -40,26 +276,25 @@ class SectionProcessor:
         Returns:
             Dictionary containing the cloned HTML and metadata
         """
-        print(f"DEBUG: Starting conservative clone of {url}")
+        logger.debug("Starting conservative clone of %s", url)
         
         # Import scraper here to avoid circular imports
         from scraper import scrape_website
-        import asyncio
         
         # Scrape the website
-        context = asyncio.run(scrape_website(url))
+        context = await scrape_website(url)
         context_dict = context.model_dump()
         
         # Extract HTML and CSS
         full_html = context_dict.get("html", "")
         raw_css = context_dict.get("css_contents", "")
         
-        print(f"DEBUG: Scraped {len(full_html)} characters of HTML and {len(raw_css)} characters of CSS")
+        logger.debug("Scraped %d characters of HTML and %d characters of CSS", len(full_html), len(raw_css))
         
         # Process with conservative approach
         result = self.process_entire_site_conservatively(full_html, raw_css, url)
         
-        print(f"DEBUG: Conservative clone completed successfully")
+        logger.debug("Conservative clone completed successfully")
         
         return {
             "combined_html": result["combined_html"],
@@ -73,77 +308,20 @@ class SectionProcessor:
 
     def process_entire_site_conservatively(self, full_html: str, full_css: str, original_url: str = None) -> Dict[str, str]:
         """Process the entire site as one piece with minimal AI intervention"""
-        print("DEBUG: Using conservative approach - processing entire site as one piece")
+        logger.debug("Using conservative approach - processing entire site as one piece")
         
         # Parse HTML and fix links/images while preserving structure
-        soup = BeautifulSoup(full_html, 'html.parser')
-        
-        # Fix image URLs to be absolute
-        for img in soup.find_all('img'):
-            src = img.get('src', '')
-            if src:
-                if original_url:
-                    from urllib.parse import urljoin
-                    img['src'] = urljoin(original_url, src)
-                elif src.startswith('/'):
-                    img['src'] = f"https://www.bu.edu{src}"
-                elif not src.startswith('http'):
-                    img['src'] = f"https://www.bu.edu/{src}"
-        
-        # Fix picture elements for responsive images
-        for picture in soup.find_all('picture'):
-            for source in picture.find_all('source'):
-                srcset = source.get('srcset', '')
-                if srcset and not srcset.startswith('http'):
-                    new_srcset = []
-                    for src_item in srcset.split(','):
-                        if ' ' in src_item:
-                            url, size = src_item.strip().split(' ', 1)
-                            if not url.startswith('http'):
-                                if url.startswith('/'):
-                                    url = f"https://www.bu.edu{url}"
-                                else:
-                                    url = f"https://www.bu.edu/{url}"
-                            new_srcset.append(f"{url} {size}")
-                        else:
-                            url = src_item.strip()
-                            if not url.startswith('http'):
-                                if url.startswith('/'):
-                                    url = f"https://www.bu.edu{url}"
-                                else:
-                                    url = f"https://www.bu.edu/{url}"
-                            new_srcset.append(url)
-                    source['srcset'] = ', '.join(new_srcset)
-        
-        # Fix external links to be #
-        for link in soup.find_all('a'):
-            href = link.get('href', '')
-            if href and href.startswith('http'):
-                link['href'] = '#'
-        
-        # Fix form actions
-        for form in soup.find_all('form'):
-            if form.get('action'):
-                form['action'] = '#'
-        
-        # Get the fixed HTML
-        fixed_html = str(soup)
-        
-        # Create the complete HTML document
-        complete_html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Recreated Website</title>
-    <style>
-{full_css}
-    </style>
-</head>
-<body>
-{fixed_html}
-</body>
-</html>"""
+        fixed_html = _rewrite_markup(full_html, functools.partial(self._fix_urls, original_url=original_url))
+        
+        # Create the complete HTML document; join sizes the result once and
+        # copies the page and stylesheet into it directly
+        complete_html = "".join((
+            _COMBINED_HTML_HEAD,
+            full_css,
+            "\n    </style>\n</head>\n<body>\n",
+            fixed_html,
+            "\n</body>\n</html>",
+        ))
         
         return {
             "combined_html": complete_html,
@@ -170,96 +348,55 @@ class SectionProcessor:
             src = img.get('src', '')
             if src:
                 # Make relative URLs absolute using the original website URL
-                if original_url:
-                    from urllib.parse import urljoin
-                    src = urljoin(original_url, src)
-                elif src.startswith('/'):
-                    src = f"https://www.bu.edu{src}"
-                elif not src.startswith('http'):
-                    src = f"https://www.bu.edu/{src}"
+                src = _absolute_url(src, original_url)
                 
                 # Store image URL with a unique identifier
                 img_id = f"img_{len(self.original_images)}"
                 self.original_images[img_id] = src
-                print(f"DEBUG: Found original image {img_id}: {src}")
+                logger.debug("Found original image %s: %s", img_id, src)
         
-        print(f"DEBUG: Total original images found: {len(self.original_images)}")
+        logger.debug("Total original images found: %d", len(self.original_images))
         
         # Try a different approach: extract sections based on visual structure
         # Instead of using trafilatura, let's preserve the original layout
         
-        # 1. Extract header/navigation (keep visual structure)
-        header = self._extract_header(soup)
-        if header:
-            header_css = self._extract_css_for_html(header, full_css)
-            sections.append(WebsiteSection(
-                name="header",
-                html=header,
-                css=header_css,
-                description="Site header with navigation and branding",
-                priority=2
-            ))
-        
-        # 2. Extract hero/banner sections (keep visual structure)
-        hero = self._extract_hero(soup)
-        if hero:
-            hero_css = self._extract_css_for_html(hero, full_css)
-            sections.append(WebsiteSection(
-                name="hero",
-                html=hero,
-                css=hero_css,
-                description="Hero banner or main promotional section",
-                priority=2
-            ))
+        sections_found = self._match_sections(soup)
+        main_content = self._extract_main_content_visual(soup)
+        if main_content is not None:
+            sections_found["main-content"] = main_content
         
-        # 3. Extract main content area (preserve visual structure)
-        main_content = self._extract_main_content_visual(full_html)
-        if main_content:
-            main_css = self._extract_css_for_html(main_content, full_css)
-            sections.append(WebsiteSection(
-                name="main-content",
-                html=main_content,
-                css=main_css,
-                description="Main content area with primary information",
-                priority=1
-            ))
+        found = [
+            (name, description, priority, sections_found[name])
+            for name, description, priority in _SECTION_INFO
+            if name in sections_found
+        ]
         
-        # 4. Extract sidebar (keep visual structure)
-        sidebar = self._extract_sidebar(soup)
-        if sidebar:
-            sidebar_css = self._extract_css_for_html(sidebar, full_css)
-            sections.append(WebsiteSection(
-                name="sidebar",
-                html=sidebar,
-                css=sidebar_css,
-                description="Sidebar with secondary navigation or content",
-                priority=3
-            ))
+        # Filtering the stylesheet per section is the CPU-heavy step; it only
+        # needs each section's tag/class/id names, so it can run off this process
+        section_css = self._filter_section_css(
+            full_css, [self._section_names(element) for *_, element in found]
+        )
         
-        # 5. Extract footer (keep visual structure)
-        footer = self._extract_footer(soup)
-        if footer:
-            footer_css = self._extract_css_for_html(footer, full_css)
+        for (name, description, priority, element), css in zip(found, section_css):
             sections.append(WebsiteSection(
-                name="footer",
-                html=footer,
-                css=footer_css,
-                description="Site footer with links and information",
-                priority=4
+                name=name,
+                html=str(element),
+                css=css,
+                description=description,
+                priority=priority
             ))
         
         return sections
     
-    def _extract_main_content_visual(self, html_content: str) -> Optional[str]:
+    def _extract_main_content_visual(self, soup: BeautifulSoup) -> Optional[Tag]:
         """Extract main content while preserving visual structure"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
         # Look for the largest content area that's not header/footer/sidebar
         body = soup.find('body')
         if not body:
             return None
         
-        # Find all major divs and sections
+        # Find all major divs and sections, scored by their markup size
+        sizes = _markup_sizes(body)
         content_candidates = []
         
         for element in body.find_all(['div', 'section', 'main', 'article']):
@@ -269,16 +406,17 @@ class SectionProcessor:
                 continue
             
             # Skip if it's too small
-            if len(str(element)) < 500:
+            size = sizes[id(element)]
+            if size < 500:
                 continue
             
-            content_candidates.append(element)
+            content_candidates.append((size, element))
         
         if content_candidates:
             # Return the largest content area
-            largest = max(content_candidates, key=lambda x: len(str(x)))
-            print(f"DEBUG: Found main content area with {len(str(largest))} characters")
-            return str(largest)
+            size, largest = max(content_candidates, key=itemgetter(0))
+            logger.debug("Found main content area with ~%d characters", size)
+            return largest
         
         return None
     
@@ -295,7 +433,7 @@ class SectionProcessor:
         for selector in main_selectors:
             element = soup.select_one(selector)
             if element:
-                print(f"DEBUG: Found main content using selector: {selector}")
+                logger.debug("Found main content using selector: %s", selector)
                 return str(element)
         
         # If no semantic main content found, try to extract the largest content area
@@ -312,115 +450,75 @@ class SectionProcessor:
             
             if content_areas:
                 # Return the largest content area
-                largest_area = max(content_areas, key=lambda x: len(str(x)))
-                print(f"DEBUG: Using largest content area with {len(str(largest_area))} characters")
+                sizes = _markup_sizes(body)
+                largest_area = max(content_areas, key=lambda x: sizes[id(x)])
+                logger.debug("Using largest content area with ~%d characters", sizes[id(largest_area)])
                 return str(largest_area)
         
         # Last resort: use trafilatura but warn about it
         try:
             extracted = trafilatura.extract(html_content, include_formatting=True)
             if extracted:
-                print("DEBUG: Using trafilatura extraction (may lose visual structure)")
+                logger.debug("Using trafilatura extraction (may lose visual structure)")
                 return extracted
         except Exception as e:
-            print(f"Trafilatura extraction failed: {e}")
-        
-        return None
-    
-    def _extract_header(self, soup: BeautifulSoup) -> Optional[str]:
-        """Extract header/navigation section"""
-        header_selectors = [
-            'header', '[role="banner"]', '.header', '.site-header', 
-            '.main-header', '.navigation', 'nav', '.nav'
-        ]
-        
-        for selector in header_selectors:
-            element = soup.select_one(selector)
-            if element:
-                return str(element)
-        
-        return None
-    
-    def _extract_sidebar(self, soup: BeautifulSoup) -> Optional[str]:
-        """Extract sidebar section"""
-        sidebar_selectors = [
-            'aside', '[role="complementary"]', '.sidebar', '.side-nav',
-            '.secondary', '.widget-area'
-        ]
-        
-        for selector in sidebar_selectors:
-            element = soup.select_one(selector)
-            if element:
-                return str(element)
-        
-        return None
-    
-    def _extract_footer(self, soup: BeautifulSoup) -> Optional[str]:
-        """Extract footer section"""
-        footer_selectors = [
-            'footer', '[role="contentinfo"]', '.footer', '.site-footer',
-            '.main-footer'
-        ]
-        
-        for selector in footer_selectors:
-            element = soup.select_one(selector)
-            if element:
-                return str(element)
+            logger.warning("Trafilatura extraction failed: %s", e)
         
         return None
     
-    def _extract_hero(self, soup: BeautifulSoup) -> Optional[str]:
-        """Extract hero/banner section"""
-        hero_selectors = [
-            '.hero', '.banner', '.jumbotron', '.hero-section',
-            '.main-banner', '[class*="hero"]', '[class*="banner"]'
-        ]
-        
-        for selector in hero_selectors:
-            element = soup.select_one(selector)
-            if element:
-                return str(element)
-        
-        return None
+    def _match_sections(self, soup: BeautifulSoup) -> Dict[str, Tag]:
+        """
+        Find the header, hero, sidebar and footer in one pass over the tree.
+        Each section gets the first element matching its earliest selector
+        in _SECTION_SELECTORS, same as trying the selectors one by one.
+        """
+        best = {}  # section name -> (selector index, element)
+        for element in _ANY_SECTION.iselect(soup):
+            for name, matchers in _SECTION_MATCHERS.items():
+                found = best.get(name)
+                for index in range(found[0] if found else len(matchers)):
+                    if matchers[index].match(element):
+                        best[name] = (index, element)
+                        break
+            if len(best) == len(_SECTION_MATCHERS) and all(index == 0 for index, _ in best.values()):
+                break
+        return {name: element for name, (_, element) in best.items()}
     
-    def _extract_css_for_html(self, html_content: str, full_css: str) -> str:
-        """Extract only the CSS that applies to the given HTML"""
-        try:
-            # For now, return the full CSS to ensure styling is preserved
-            # The CSS filtering was too aggressive and removing important styles
-            print(f"DEBUG: Using full CSS for section (length: {len(full_css)})")
-            return full_css
-        except Exception as e:
-            print(f"CSS extraction failed: {e}")
-            return full_css  # Fallback to full CSS
+    def _section_names(self, element: Tag) -> Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str]]:
+        """
+        Tag, class and id names used in a section; html and body are
+        included, with their classes and ids, since their rules style the
+        section too (e.g. "body.home .x", "html.js .menu").
+        """
+        elements, classes, ids = {'html', 'body'}, set(), set()
+        roots = [parent for parent in element.parents if parent.name in ('html', 'body')]
+        for tag in [*roots, element, *element.find_all(True)]:
+            elements.add(tag.name)
+            classes.update(tag.get('class', ()))
+            if tag.get('id'):
+                ids.add(tag['id'])
+        return frozenset(elements), frozenset(classes), frozenset(ids)
     
-    def _selector_used_in_html(self, selector: str, html_content: str) -> bool:
-        """Check if a CSS selector is used in the HTML"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Simple check - you might want more sophisticated selector matching
-        if selector.startswith('.'):
-            # Class selector
-            class_name = selector[1:]
-            return soup.find(class_=class_name) is not None
-        elif selector.startswith('#'):
-            # ID selector
-            id_name = selector[1:]
-            return soup.find(id=id_name) is not None
-        else:
-            # Tag selector
-            return soup.find(selector) is not None
+    def _filter_section_css(self, full_css: str, section_names: List[Tuple[FrozenSet[str], ...]]) -> List[str]:
+        """
+        Key-selector filter full_css once per section. Large stylesheets
+        are filtered in worker processes, one section each.
+        """
+        if len(section_names) < 2 or len(full_css) < _PARALLEL_CSS_MIN_CHARS:
+            return [filter_css_by_key_selector(full_css, *names) for names in section_names]
+        
+        return list(_css_pool().map(
+            filter_css_by_key_selector,
+            itertools.repeat(full_css, len(section_names)),
+            *zip(*section_names),
+        ))
     
     async def process_section(self, section: WebsiteSection) -> Dict[str, str]:
         """Process a single section with Claude AI"""
         prompt = self._format_section_prompt(section)
         
         try:
-            # Add delay to avoid rate limiting
-            import asyncio
-            await asyncio.sleep(1)
-            
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model="claude-sonnet-4-20250514",
                 max_tokens=2000,  # Reduced from 4000
                 temperature=0.1,
@@ -445,11 +543,11 @@ class SectionProcessor:
             ai_images = len(ai_soup.find_all('img'))
             original_images = len(original_soup.find_all('img'))
             
-            print(f"DEBUG: Section {section.name} - Original images: {original_images}, AI output images: {ai_images}")
+            logger.debug("Section %s - Original images: %d, AI output images: %d", section.name, original_images, ai_images)
             
             # If AI didn't preserve images or structure, use original HTML with link fixes
             if ai_images < original_images or len(html_code) < len(section.html) * 0.5:
-                print(f"DEBUG: AI didn't preserve structure properly, using original HTML with link fixes")
+                logger.debug("AI didn't preserve structure properly, using original HTML with link fixes")
                 fixed_html = self._fix_links_only(section.html)
                 return {
                     "html": fixed_html,
@@ -468,7 +566,7 @@ class SectionProcessor:
             }
             
         except Exception as e:
-            print(f"Error processing section {section.name}: {e}")
+            logger.error("Error processing section %s: %s", section.name, e)
             return {
                 "html": section.html,
                 "css": section.css,
@@ -479,22 +577,14 @@ class SectionProcessor:
     
     def _fix_links_only(self, html_content: str) -> str:
         """Fix only links in HTML, preserve everything else"""
-        from bs4 import BeautifulSoup
-        
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Fix links - replace external URLs with #
-        for link in soup.find_all('a'):
-            href = link.get('href', '')
-            if href and href.startswith('http'):
-                link['href'] = '#'
-        
-        # Fix form actions
-        for form in soup.find_all('form'):
-            if form.get('action'):
-                form['action'] = '#'
-        
-        return str(soup)
+        if _RE_UNQUOTED_LINK_ATTR.search(html_content):
+            # The substitutions below only see quoted values
+            return _rewrite_markup(html_content, _neutralize_links)
+        
+        # Section HTML is serialized by BeautifulSoup, so attribute values are
+        # always quoted: rewrite them in place instead of a parse round-trip
+        html_content = _RE_EXTERNAL_HREF.sub(_neutralize_match, html_content)
+        return _RE_FORM_ACTION.sub(_neutralize_match, html_content)
     
     def _format_section_prompt(self, section: WebsiteSection) -> str:
         """Format prompt for processing a specific section"""
@@ -528,59 +618,57 @@ Return only:
     
     def _extract_code_block(self, block_type: str, text: str) -> str:
         """Extract code from markdown code blocks"""
-        pattern = f"```{block_type}\\n(.*?)```"
-        match = re.search(pattern, text, re.DOTALL)
+        pattern = _CODE_BLOCK_RES.get(block_type)
+        if pattern is None:
+            pattern = re.compile(f"```{re.escape(block_type)}\\n(.*?)```", re.DOTALL)
+        match = pattern.search(text)
         return match.group(1).strip() if match else ""
     
     async def process_all_sections(self, sections: List[WebsiteSection]) -> List[Dict[str, str]]:
         """Process all sections and return results"""
-        results = []
-        
-        # Process sections in priority order
+        # Results stay in priority order
         sorted_sections = sorted(sections, key=lambda x: x.priority)
         
-        for section in sorted_sections:
-            result = await self.process_section(section)
-            results.append(result)
+        # Sections are independent Claude calls: run them together, with a
+        # cap on requests in flight to stay under the rate limit
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_SECTIONS)
+        
+        async def process(section: WebsiteSection) -> Dict[str, str]:
+            async with semaphore:
+                return await self.process_section(section)
         
-        return results
+        return await asyncio.gather(*(process(section) for section in sorted_sections))
     
     def combine_sections(self, processed_sections: List[Dict[str, str]]) -> Dict[str, str]:
         """Combine all processed sections into a complete website"""
-        combined_html = []
-        combined_css = []
+        # Streamed into one buffer, so the large section strings are only
+        # copied once
+        combined_html = io.StringIO()
+        write = combined_html.write
         
         # Add basic HTML structure
-        combined_html.append("<!DOCTYPE html>")
-        combined_html.append('<html lang="en">')
-        combined_html.append('<head>')
-        combined_html.append('    <meta charset="UTF-8">')
-        combined_html.append('    <meta name="viewport" content="width=device-width, initial-scale=1.0">')
-        combined_html.append('    <title>Recreated Website</title>')
-        combined_html.append('    <style>')
+        write(_COMBINED_HTML_HEAD)
         
         # Add CSS from all sections
         for section in processed_sections:
             if section.get("css"):
-                combined_css.append(f"/* {section['section_name']} styles */")
-                combined_css.append(section["css"])
+                write(f"/* {section['section_name']} styles */\n")
+                write(section["css"])
+                write("\n")
         
-        combined_html.extend(combined_css)
-        combined_html.append('    </style>')
-        combined_html.append('</head>')
-        combined_html.append('<body>')
+        write('    </style>\n</head>\n<body>\n')
         
         # Add HTML from all sections
         for section in processed_sections:
             if section.get("html"):
-                combined_html.append(f"<!-- {section['section_name']} -->")
-                combined_html.append(section["html"])
+                write(f"<!-- {section['section_name']} -->\n")
+                write(section["html"])
+                write("\n")
         
-        combined_html.append('</body>')
-        combined_html.append('</html>')
+        write('</body>\n</html>')
         
         # Process the combined HTML to fix image URLs and links
-        final_html = self._process_combined_html('\n'.join(combined_html))
+        final_html = self._process_combined_html(combined_html.getvalue())
         
         return {
             "combined_html": final_html,
@@ -589,65 +677,42 @@ Return only:
     
     def _process_combined_html(self, html_content: str) -> str:
         """Process combined HTML to fix images and links"""
-        from bs4 import BeautifulSoup
-        import re
+        root, doctype = _parse_markup(html_content)
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Found %d images in processed HTML", len(root.xpath('.//img')))
+            logger.debug("Original images available: %d", len(getattr(self, 'original_images', {})))
         
-        print(f"DEBUG: Found {len(soup.find_all('img'))} images in processed HTML")
-        print(f"DEBUG: Original images available: {len(getattr(self, 'original_images', {}))}")
+        # Make image URLs absolute and neutralize links
+        self._fix_urls(root)
         
-        # Process all images to make them absolute URLs
-        for img in soup.find_all('img'):
-            current_src = img.get('src', '')
-            if current_src:
-                # If it's already an absolute URL, keep it
-                if current_src.startswith('http'):
-                    continue
-                
-                # Make relative URLs absolute
-                if current_src.startswith('/'):
-                    img['src'] = f"https://www.bu.edu{current_src}"
-                    print(f"DEBUG: Made image absolute: {current_src} -> https://www.bu.edu{current_src}")
-                else:
-                    img['src'] = f"https://www.bu.edu/{current_src}"
-                    print(f"DEBUG: Made image absolute: {current_src} -> https://www.bu.edu/{current_src}")
-        
-        # Also process picture elements (for responsive images)
-        for picture in soup.find_all('picture'):
-            for source in picture.find_all('source'):
-                srcset = source.get('srcset', '')
+        return _serialize_markup(root, doctype)
+
+    def _fix_urls(self, root: html.HtmlElement, original_url: str = None) -> None:
+        """Make image URLs absolute and point external links and forms at #"""
+        if original_url:
+            # One lxml pass resolves every src/href and CSS url() against the
+            # page. Link and form targets keep their written values, so
+            # "#frag" anchors survive and only real external links become #
+            targets = [
+                (element, attribute, element.get(attribute))
+                for element, attribute in _link_targets(root)
+            ]
+            root.make_links_absolute(original_url, resolve_base_href=True, handle_failures='ignore')
+            for element, attribute, value in targets:
+                element.set(attribute, value)
+        
+        # Everything else is fixed in one walk over the tree
+        for element in root.iter('img', 'source', 'a', 'form'):
+            tag = element.tag
+            if tag == 'img':
+                src = element.get('src')
+                if src and not original_url:
+                    element.set('src', _absolute_url(src, None))
+            elif tag == 'source':
+                # Responsive images; lxml doesn't treat srcset as a link
+                srcset = element.get('srcset')
                 if srcset and not srcset.startswith('http'):
-                    # Make srcset URLs absolute
-                    new_srcset = []
-                    for src_item in srcset.split(','):
-                        if ' ' in src_item:
-                            url, size = src_item.strip().split(' ', 1)
-                            if not url.startswith('http'):
-                                if url.startswith('/'):
-                                    url = f"https://www.bu.edu{url}"
-                                else:
-                                    url = f"https://www.bu.edu/{url}"
-                            new_srcset.append(f"{url} {size}")
-                        else:
-                            url = src_item.strip()
-                            if not url.startswith('http'):
-                                if url.startswith('/'):
-                                    url = f"https://www.bu.edu{url}"
-                                else:
-                                    url = f"https://www.bu.edu/{url}"
-                            new_srcset.append(url)
-                    source['srcset'] = ', '.join(new_srcset)
-        
-        # Fix links - replace external URLs with #
-        for link in soup.find_all('a'):
-            href = link.get('href', '')
-            if href and href.startswith('http'):
-                link['href'] = '#'
-        
-        # Fix form actions
-        for form in soup.find_all('form'):
-            if form.get('action'):
-                form['action'] = '#'
-        
-        return str(soup) 
\ No newline at end of file
+                    element.set('srcset', _absolute_srcset(srcset, original_url))
+            else:
+                _neutralize_link(element)
@@ -0,0 +1,18 @@
+from app.filter_css import _html_matcher, _key_selector_matches
+
+
+def test_nested_pseudo_class_arguments_are_stripped_whole():
+    elements, classes, ids = frozenset({"div", "p"}), frozenset({"x"}), frozenset()
+
+    assert _key_selector_matches(":is(:not(.a) b)", elements, classes, ids)
+    assert _key_selector_matches("p:not(:is(.a, .b))", elements, classes, ids)
+    assert not _key_selector_matches("span:is(:not(.a) b)", elements, classes, ids)
+
+
+def test_html_matcher_keeps_tag_class_and_id_names_apart():
+    match = _html_matcher('<div class="main"><a id="top" href="/">x</a></div>')
+
+    assert match("a") and match(".main") and match("#top") and match("div .main")
+    assert not match(".a")
+    assert not match("#main")
+    assert not match("top")
@@ -0,0 +1,18 @@
+from app.recreate_site import build_summary_and_minimal_html
+
+
+def test_small_page_is_reduced_to_its_structural_elements():
+    page = (
+        "<!DOCTYPE html><html><head><title>Shop</title><style>p{}</style></head>"
+        '<body><header><nav><a href="/">Home</a></nav></header><main><p>Hi</p></main></body></html>'
+    )
+    summary, focused_html = build_summary_and_minimal_html(
+        {"title": "Shop", "images": ["a.png"], "summary": "s", "html": page}
+    )
+
+    assert summary == {"title": "Shop", "image_count": 1, "images": ["a.png"], "summary": "s"}
+    assert focused_html == (
+        '<header><nav><a href="/">Home</a></nav></header>\n'
+        '<nav><a href="/">Home</a></nav>\n'
+        "<main><p>Hi</p></main>"
+    )
@@ -0,0 +1,122 @@
+import pytest
+
+import section_processor
+from section_processor import SectionProcessor, _parse_markup, _serialize_markup, shutdown_css_pool
+
+
+HTML_LESS_PAGE = (
+    "<!doctype html><meta charset=utf-8><title>Shop</title>"
+    "<link rel=stylesheet href=/a.css><style>.x{color:red}</style>"
+    "<div class=x><img src=/i.png></div>"
+)
+
+
+def test_html_less_page_keeps_head(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    result = SectionProcessor().process_entire_site_conservatively(
+        HTML_LESS_PAGE, "", "https://shop.example/"
+    )
+    fixed_html = result["sections"][0]["html"]
+
+    assert '<meta charset="utf-8">' in fixed_html
+    assert "<title>Shop</title>" in fixed_html
+    assert '<link rel="stylesheet" href="https://shop.example/a.css">' in fixed_html
+    assert "<style>.x{color:red}</style>" in fixed_html
+    assert '<img src="https://shop.example/i.png">' in fixed_html
+
+
+def test_bom_and_xml_declaration_are_stripped():
+    markup = '\ufeff<?xml version="1.0" encoding="utf-8"?><head><title>t</title></head><body class=b>y</body>'
+    serialized = _serialize_markup(*_parse_markup(markup))
+
+    assert serialized == '<html><head><title>t</title></head><body class="b">y</body></html>'
+
+
+def test_fragment_keeps_head_level_tags_and_text():
+    markup = 'lead <style>a{}</style><div>z</div> tail'
+
+    assert _serialize_markup(*_parse_markup(markup)) == markup
+
+
+def test_fix_links_only_matches_startswith_http(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    fixed = SectionProcessor()._fix_links_only(
+        '<a href="https://x.com/it\'s">a</a><a href="HTTP://X">b</a>'
+        '<a href="/in">c</a><form action="/go"></form>'
+    )
+
+    assert fixed == '<a href="#">a</a><a href="HTTP://X">b</a><a href="/in">c</a><form action="#"></form>'
+
+
+def test_fragment_anchors_and_relative_links_are_kept(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    result = SectionProcessor().process_entire_site_conservatively(
+        '<body><a href="#top">t</a><a href="/about">a</a><a href="https://x.com">x</a>'
+        '<form action=""></form></body>', "", "https://shop.example/p/"
+    )
+    fixed_html = result["sections"][0]["html"]
+
+    assert '<a href="#top">t</a><a href="/about">a</a><a href="#">x</a><form action=""></form>' in fixed_html
+
+
+def test_malformed_url_does_not_fail_the_page(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    result = SectionProcessor().process_entire_site_conservatively(
+        '<body><a href="http://[bad">b</a><img src="http://[bad"><img src="/i.png"></body>',
+        "", "https://shop.example/"
+    )
+    fixed_html = result["sections"][0]["html"]
+
+    assert '<a href="#">b</a><img src="http://[bad"><img src="https://shop.example/i.png">' in fixed_html
+
+
+def test_leading_fragment_text_stays_escaped(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    processor = SectionProcessor()
+    markup = "&lt;script&gt;alert(1)&lt;/script&gt; <p>x</p>"
+
+    assert processor.process_entire_site_conservatively(markup, "")["sections"][0]["html"] == markup
+    assert processor._fix_links_only(markup + "<a href=/in>i</a>") == markup + '<a href="/in">i</a>'
+
+
+def test_doctype_only_page_is_returned_unchanged(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    result = SectionProcessor().process_entire_site_conservatively("<!DOCTYPE html>", "")
+
+    assert result["sections"][0]["html"] == "<!DOCTYPE html>"
+
+
+def test_fix_links_only_skips_scripts_styles_and_comments(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    opaque = (
+        '<SCRIPT>var a = \'<a href="http://x">\';</script>'
+        '<style>/* <form action="/s"> */</style>'
+        '<!-- <a href="http://y"> -->'
+    )
+    fixed = SectionProcessor()._fix_links_only(opaque + '<a href="http://z">z</a><form action="/go"></form>')
+
+    assert fixed == opaque + '<a href="#">z</a><form action="#"></form>'
+
+
+def test_shutdown_css_pool_stops_started_workers(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    monkeypatch.setattr(section_processor, "_PARALLEL_CSS_MIN_CHARS", 0)
+    names = (frozenset({"p"}), frozenset(), frozenset())
+
+    assert SectionProcessor()._filter_section_css("p{color:red}div{}", [names, names]) == ["p{color:red}"] * 2
+    pool = section_processor._css_pool()
+    shutdown_css_pool()
+
+    assert section_processor._css_pool.cache_info().currsize == 0
+    with pytest.raises(RuntimeError):
+        pool.submit(int)
+
+
+def test_section_css_keeps_rules_keyed_on_html_and_body(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    sections = SectionProcessor().detect_sections(
+        '<html class="js"><body class="home"><footer class="f">x</footer></body></html>',
+        "body.home{margin:0} html.js .f{color:red} body.about{margin:1px} .g{}",
+    )
+
+    assert [section.css for section in sections] == ["body.home{margin:0}\nhtml.js .f{color:red}"]